@@ -9,6 +9,20 @@ CREATE TABLE IF NOT EXISTS uploads (
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Hash SHA-256 del contenido para no re-indexar ficheros duplicados
+ALTER TABLE uploads ADD COLUMN IF NOT EXISTS content_sha BYTEA UNIQUE;
+
+-- Trabajos de indexación en segundo plano (uno por upload)
+CREATE TABLE IF NOT EXISTS index_jobs (
+    id SERIAL PRIMARY KEY,
+    upload_id INTEGER NOT NULL REFERENCES uploads(id) ON DELETE CASCADE,
+    status TEXT NOT NULL DEFAULT 'queued',
+    chunks_indexed INTEGER,
+    error TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
 -- Log de chats básicos (puede ampliarse con usuario/sesión)
 CREATE TABLE IF NOT EXISTS chat_logs (
     id SERIAL PRIMARY KEY,
@@ -20,4 +34,5 @@ CREATE TABLE IF NOT EXISTS chat_logs (
 
 -- Índices mínimos
 CREATE INDEX IF NOT EXISTS idx_uploads_created_at ON uploads(created_at);
+CREATE INDEX IF NOT EXISTS idx_index_jobs_upload_id ON index_jobs(upload_id);
 CREATE INDEX IF NOT EXISTS idx_chat_logs_created_at ON chat_logs(created_at);
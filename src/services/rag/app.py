@@ -4,10 +4,16 @@ import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from prometheus_client import make_asgi_app
 
 from .routes import upload, search, health
-from .core.indexing import ensure_collection
+from .core.db import close_pool
+from .core.embeddings import aclose_service
+from .core.indexing import ensure_collection, shutdown_extract_pool
+from .core.jobs import start_workers, stop_workers
+from .core.uploads import start_coalescer, stop_coalescer
+from .core.vector_store import close_async_client
 from .config import EMBED_COLLECTION_CONTENT, EMBED_COLLECTION_NAME
 
 logging.basicConfig(level=logging.INFO)
@@ -19,7 +25,15 @@ async def lifespan(app: FastAPI):
     """Lifecycle events."""
     logger.info("Starting RAG Server...")
     # Initialize DB/Collections if needed
+    await start_coalescer()
+    await start_workers()
     yield
+    await stop_workers()
+    await stop_coalescer()
+    await aclose_service()
+    await close_async_client()
+    shutdown_extract_pool()
+    close_pool()
     logger.info("Shutting down RAG Server...")
 
 
@@ -29,6 +43,8 @@ def create_app() -> FastAPI:
         title="lotoAI RAG Server",
         version="0.3.0",
         lifespan=lifespan,
+        # orjson encodes response bodies in native code instead of json.dumps
+        default_response_class=ORJSONResponse,
     )
     
     # Routes
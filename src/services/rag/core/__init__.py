@@ -1,9 +1,11 @@
 """RAG core module exports."""
 
-from .chunking import chunk_text
+from .chunking import chunk_text, iter_chunks
 from .embeddings import get_service, embed_text, EmbeddingService
 from .extraction import extract_text_from_bytes
-from .indexing import index_filename, index_content, ensure_collection
+from .indexing import index_filename, index_content, index_content_async, ensure_collection
+from .jobs import enqueue_index_job, get_index_status, start_workers, stop_workers
+from .uploads import record_upload, record_uploads_bulk, start_coalescer, stop_coalescer
 from .search import (
     vector_search,
     search_content,
@@ -11,11 +13,16 @@ from .search import (
     rerank_results,
     reciprocal_rank_fusion,
     hybrid_search,
+    hybrid_search_async,
+    hybrid_search_batch_async,
+    compare_rerank_async,
+    compare_rerank_batch_async,
 )
 
 __all__ = [
     # Chunking
     "chunk_text",
+    "iter_chunks",
     # Embeddings
     "get_service",
     "embed_text",
@@ -25,7 +32,18 @@ __all__ = [
     # Indexing
     "index_filename",
     "index_content",
+    "index_content_async",
     "ensure_collection",
+    # Jobs
+    "enqueue_index_job",
+    "get_index_status",
+    "start_workers",
+    "stop_workers",
+    # Uploads
+    "record_upload",
+    "record_uploads_bulk",
+    "start_coalescer",
+    "stop_coalescer",
     # Search
     "vector_search",
     "search_content",
@@ -33,4 +51,8 @@ __all__ = [
     "rerank_results",
     "reciprocal_rank_fusion",
     "hybrid_search",
+    "hybrid_search_async",
+    "hybrid_search_batch_async",
+    "compare_rerank_async",
+    "compare_rerank_batch_async",
 ]
@@ -0,0 +1,99 @@
+"""Shared Postgres connection pool."""
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Sequence, Set
+
+from psycopg2.extensions import connection as PgConnection, cursor as PgCursor
+from psycopg2.pool import ThreadedConnectionPool
+
+from ..config import DATABASE_URL, DB_POOL_MIN, DB_POOL_MAX
+
+logger = logging.getLogger("rag-server.db")
+
+# Global instance (lazy initialized)
+_pool: Optional[ThreadedConnectionPool] = None
+_pool_lock = threading.Lock()
+
+# Statements prepared once per pooled connection: name -> SQL with $n params
+_statements: Dict[str, str] = {}
+
+
+class _PooledConnection(PgConnection):
+    """Connection that remembers which statements are prepared on it."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared: Set[str] = set()
+
+
+def get_pool() -> ThreadedConnectionPool:
+    """
+    Get or create the process-wide connection pool.
+
+    Borrowing an open connection skips the TCP connect and authentication
+    round trips that psycopg2.connect pays on every request.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadedConnectionPool(
+                    DB_POOL_MIN,
+                    DB_POOL_MAX,
+                    dsn=DATABASE_URL,
+                    connection_factory=_PooledConnection,
+                )
+                logger.info(f"Postgres pool initialized (min={DB_POOL_MIN}, max={DB_POOL_MAX})")
+    return _pool
+
+
+@contextmanager
+def get_connection() -> Iterator[PgConnection]:
+    """
+    Borrow a pooled connection for one transaction.
+
+    Like `with psycopg2.connect(...) as conn`, the transaction is committed on
+    success and rolled back on error; the connection then goes back to the pool.
+    Registered statements not yet prepared on the connection are prepared first.
+    """
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        missing = _statements.keys() - conn.prepared
+        if missing:
+            # Own transaction, so a rollback of the caller's work can't undo it
+            with conn, conn.cursor() as cur:
+                for name in missing:
+                    cur.execute(f"PREPARE {name} AS {_statements[name]}")
+            conn.prepared.update(missing)
+        with conn:
+            yield conn
+    finally:
+        pool.putconn(conn, close=bool(conn.closed))
+
+
+def prepare_statement(name: str, sql: str) -> None:
+    """
+    Register a statement to be prepared on every pooled connection.
+
+    Postgres then parses and plans it once per connection instead of on
+    every execution. Parameters are written as $1, $2, ...
+    """
+    _statements[name] = sql
+
+
+def execute_prepared(cur: PgCursor, name: str, params: Sequence) -> None:
+    """Execute a statement registered with prepare_statement."""
+    placeholders = ", ".join(["%s"] * len(params))
+    cur.execute(f"EXECUTE {name} ({placeholders})", params)
+
+
+def close_pool() -> None:
+    """Close all pooled connections."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
@@ -1,9 +1,24 @@
 """Embedding service abstraction layer."""
 
+import asyncio
+import hashlib
 import logging
 import os
+import threading
+import weakref
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..config import (
+    EMBED_CACHE_SIZE,
+    EMBED_CACHE_DIR,
+    OPENAI_EMBEDDING_DIM,
+    OPENAI_MAX_CONNECTIONS,
+    USE_FP16,
+)
 
 logger = logging.getLogger("rag-server.embeddings")
 
@@ -21,11 +36,23 @@ class EmbeddingService(ABC):
         """Generate embeddings for multiple texts."""
         pass
     
+    async def aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Async variant of embed_batch; runs the sync call in a worker thread."""
+        return await asyncio.to_thread(self.embed_batch, texts)
+    
+    async def aclose(self) -> None:
+        """Release async resources bound to the running event loop (none by default)."""
+    
     @property
     @abstractmethod
     def dimension(self) -> int:
         """Return the embedding dimension."""
         pass
+    
+    @property
+    def model_name(self) -> str:
+        """Return an identifier of the underlying model (used as cache namespace)."""
+        return type(self).__name__
 
 
 class OpenAIEmbeddingService(EmbeddingService):
@@ -37,13 +64,30 @@ class OpenAIEmbeddingService(EmbeddingService):
         "text-embedding-ada-002": 1536,
     }
     
-    def __init__(self, api_key: str, model: str = "text-embedding-3-small"):
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "text-embedding-3-small",
+        target_dim: Optional[int] = None,
+    ):
         try:
             from openai import OpenAI
             self.client = OpenAI(api_key=api_key)
             self.model = model
-            self._dimension = self.DIMENSIONS.get(model, 1536)
-            logger.info(f"OpenAI embedding service initialized with model {model}")
+            self._api_key = api_key
+            self._aclients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = (
+                weakref.WeakKeyDictionary()
+            )
+            
+            # Only text-embedding-3-* models accept a shortened (Matryoshka) size
+            if target_dim and not model.startswith("text-embedding-3"):
+                logger.warning(f"Model {model} does not support custom dimensions, ignoring {target_dim}")
+                target_dim = None
+            self.target_dim = target_dim
+            self._extra_args = {"dimensions": target_dim} if target_dim else {}
+            
+            self._dimension = target_dim or self.DIMENSIONS.get(model, 1536)
+            logger.info(f"OpenAI embedding service initialized with model {model} (dim={self._dimension})")
         except ImportError:
             raise ImportError("openai package required for OpenAI embeddings")
     
@@ -51,7 +95,8 @@ class OpenAIEmbeddingService(EmbeddingService):
         """Generate embedding for single text."""
         response = self.client.embeddings.create(
             model=self.model,
-            input=text
+            input=text,
+            **self._extra_args,
         )
         return response.data[0].embedding
     
@@ -59,13 +104,61 @@ class OpenAIEmbeddingService(EmbeddingService):
         """Generate embeddings for multiple texts."""
         response = self.client.embeddings.create(
             model=self.model,
-            input=texts
+            input=texts,
+            **self._extra_args,
         )
         return [item.embedding for item in response.data]
     
+    async def aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings with the async client, without blocking the event loop."""
+        response = await self._get_async_client().embeddings.create(
+            model=self.model,
+            input=texts,
+            **self._extra_args,
+        )
+        return [item.embedding for item in response.data]
+    
+    def _get_async_client(self):
+        """
+        Get or create the AsyncOpenAI client for the running event loop.
+        
+        The client keeps a pool of HTTP/2 keep-alive connections, which are
+        bound to the loop that opened them (same as the async Qdrant client),
+        so each loop gets its own client; aclose releases it.
+        """
+        loop = asyncio.get_running_loop()
+        aclient = self._aclients.get(loop)
+        if aclient is None:
+            import httpx
+            from openai import AsyncOpenAI
+            
+            limits = httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+            )
+            try:
+                http_client = httpx.AsyncClient(http2=True, limits=limits)
+            except ImportError:
+                logger.warning("h2 package not installed, OpenAI async client falling back to HTTP/1.1")
+                http_client = httpx.AsyncClient(limits=limits)
+            
+            aclient = AsyncOpenAI(api_key=self._api_key, http_client=http_client)
+            self._aclients[loop] = aclient
+        return aclient
+    
+    async def aclose(self) -> None:
+        """Close the AsyncOpenAI client of the running event loop, if any."""
+        aclient = self._aclients.pop(asyncio.get_running_loop(), None)
+        if aclient is not None:
+            await aclient.close()
+    
     @property
     def dimension(self) -> int:
         return self._dimension
+    
+    @property
+    def model_name(self) -> str:
+        return f"openai:{self.model}:{self._dimension}"
 
 
 class SentenceTransformerEmbeddingService(EmbeddingService):
@@ -75,8 +168,14 @@ class SentenceTransformerEmbeddingService(EmbeddingService):
         try:
             from sentence_transformers import SentenceTransformer
             self.model = SentenceTransformer(model_name)
+            self._model_name = model_name
             self._dimension = self.model.get_sentence_embedding_dimension()
-            logger.info(f"SentenceTransformer loaded: {model_name}")
+            
+            import torch
+            if USE_FP16 and torch.cuda.is_available():
+                self.model.half()
+            
+            logger.info(f"SentenceTransformer loaded: {model_name} (device={self.model.device})")
         except ImportError:
             raise ImportError("sentence-transformers package required")
     
@@ -89,6 +188,139 @@ class SentenceTransformerEmbeddingService(EmbeddingService):
     @property
     def dimension(self) -> int:
         return self._dimension
+    
+    @property
+    def model_name(self) -> str:
+        return f"local:{self._model_name}"
+
+
+class CachedEmbeddingService(EmbeddingService):
+    """
+    Caching decorator around another embedding service.
+    
+    Vectors are kept in an in-process LRU and, when `diskcache` is available,
+    in a disk tier shared between worker processes. The LRU stores float32
+    arrays (4 bytes per dimension, about 6 KB for a 1536-dim vector) rather
+    than lists of Python floats, which take roughly eight times as much. Keys are a BLAKE2 digest
+    of the text namespaced by model, so switching models never serves stale
+    vectors.
+    """
+    
+    def __init__(
+        self,
+        service: EmbeddingService,
+        max_size: int = EMBED_CACHE_SIZE,
+        cache_dir: Optional[str] = EMBED_CACHE_DIR,
+    ):
+        self.service = service
+        self.max_size = max_size
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = _open_disk_cache(cache_dir)
+    
+    def embed(self, text: str) -> List[float]:
+        key = self._key(text)
+        vector = self._get(key)
+        if vector is None:
+            vector = self.service.embed(text)
+            self._put(key, vector)
+        return vector
+    
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        keys, vectors, missing = self._lookup(texts)
+        if missing:
+            computed = self.service.embed_batch(list(missing.values()))
+            vectors = self._fill(keys, vectors, missing, computed)
+        return vectors
+    
+    async def aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        keys, vectors, missing = self._lookup(texts)
+        if missing:
+            computed = await self.service.aembed_batch(list(missing.values()))
+            vectors = self._fill(keys, vectors, missing, computed)
+        return vectors
+    
+    async def aclose(self) -> None:
+        await self.service.aclose()
+    
+    @property
+    def dimension(self) -> int:
+        return self.service.dimension
+    
+    @property
+    def model_name(self) -> str:
+        return self.service.model_name
+    
+    def _lookup(self, texts: List[str]):
+        """Return cache keys, cached vectors (None on miss) and unique misses by key."""
+        keys = [self._key(t) for t in texts]
+        vectors: List[Optional[List[float]]] = [self._get(k) for k in keys]
+        
+        missing: Dict[str, str] = {}
+        for key, text, vector in zip(keys, texts, vectors):
+            if vector is None:
+                missing.setdefault(key, text)
+        return keys, vectors, missing
+    
+    def _fill(self, keys, vectors, missing, computed) -> List[List[float]]:
+        """Store freshly computed vectors and stitch them into the batch result."""
+        by_key = dict(zip(missing, computed))
+        for key, vector in by_key.items():
+            self._put(key, vector)
+        return [v if v is not None else by_key[k] for k, v in zip(keys, vectors)]
+    
+    def _key(self, text: str) -> str:
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+        return f"{digest}:{self.model_name}"
+    
+    def _get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                self._memory.move_to_end(key)
+                return cached.tolist()
+        
+        vector = None
+        if self._disk is not None:
+            try:
+                vector = self._disk.get(key)
+            except Exception as exc:
+                logger.warning(f"Embedding disk cache read failed: {exc}")
+                vector = None
+            if vector is not None:
+                self._remember(key, vector)
+        return vector
+    
+    def _put(self, key: str, vector: List[float]) -> None:
+        self._remember(key, vector)
+        if self._disk is not None:
+            try:
+                self._disk.set(key, vector)
+            except Exception as exc:
+                logger.warning(f"Embedding disk cache write failed: {exc}")
+    
+    def _remember(self, key: str, vector: List[float]) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._memory[key] = np.asarray(vector, dtype=np.float32)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_size:
+                self._memory.popitem(last=False)
+
+
+def _open_disk_cache(directory: Optional[str]) -> Optional[Any]:
+    """Open the shared on-disk embedding cache, or None if unavailable."""
+    if not directory:
+        return None
+    try:
+        from diskcache import Cache
+        return Cache(directory)
+    except ImportError:
+        logger.info("diskcache not installed, embedding cache is memory-only")
+    except Exception as exc:
+        logger.warning(f"Failed to open embedding disk cache at {directory}: {exc}")
+    return None
 
 
 def get_embedding_service() -> Optional[EmbeddingService]:
@@ -102,7 +334,9 @@ def get_embedding_service() -> Optional[EmbeddingService]:
     
     if openai_key:
         try:
-            return OpenAIEmbeddingService(openai_key, openai_model)
+            return OpenAIEmbeddingService(
+                openai_key, openai_model, OPENAI_EMBEDDING_DIM or None
+            )
         except Exception as exc:
             logger.warning(f"Failed to init OpenAI embeddings: {exc}")
     
@@ -121,13 +355,21 @@ _embedding_service: Optional[EmbeddingService] = None
 
 
 def get_service() -> Optional[EmbeddingService]:
-    """Get or create the global embedding service instance."""
+    """Get or create the global (cached) embedding service instance."""
     global _embedding_service
     if _embedding_service is None:
-        _embedding_service = get_embedding_service()
+        service = get_embedding_service()
+        if service is not None:
+            _embedding_service = CachedEmbeddingService(service)
     return _embedding_service
 
 
+async def aclose_service() -> None:
+    """Close the async clients the global service opened on the running event loop."""
+    if _embedding_service is not None:
+        await _embedding_service.aclose()
+
+
 def embed_text(text: str) -> List[float]:
     """Convenience function to embed text using the global service."""
     service = get_service()
@@ -2,10 +2,23 @@
 
 import io
 import logging
+import os
 from typing import Optional
 
 logger = logging.getLogger("rag-server.extraction")
 
+# Translation table for _clean_text: drops C0 controls, DEL, C1 controls and
+# the invisible format characters commonly found in PDFs. Whitespace controls
+# are mapped instead so the words they separate don't get glued together:
+# tabs become spaces, CR / vertical tab / form feed (PDF page breaks) newlines
+_CTRL_TBL = dict.fromkeys(c for c in range(0x20) if c != 0x0A)
+_CTRL_TBL.update(dict.fromkeys(range(0x7F, 0xA0)))
+_CTRL_TBL.update(dict.fromkeys([0xAD, *range(0x200B, 0x2010), 0x2060, 0xFEFF]))
+_CTRL_TBL.update({0x09: " ", 0x0B: "\n", 0x0C: "\n", 0x0D: "\n"})
+
+# Shared markdown-it parser (lazy initialized)
+_markdown_parser = None
+
 
 def extract_text_from_bytes(data: bytes, content_type: str, filename: str) -> str:
     """
@@ -15,40 +28,43 @@ def extract_text_from_bytes(data: bytes, content_type: str, filename: str) -> st
     Returns:
         Extracted and cleaned text, empty string on failure.
     """
-    ct = (content_type or "").lower()
-    name = filename.lower()
-    text = ""
-    
-    # PDF
-    if "pdf" in ct or name.endswith(".pdf"):
-        text = _extract_pdf(data)
-    
-    # DOCX
-    elif "word" in ct or name.endswith((".docx", ".doc")):
-        text = _extract_docx(data)
-    
-    # HTML
-    elif "html" in ct or name.endswith((".html", ".htm")):
-        text = _extract_html(data)
-    
-    # Markdown
-    elif name.endswith(".md"):
-        text = _extract_markdown(data)
-    
-    # Plain text (fallback)
-    else:
-        text = _extract_plaintext(data)
+    # MIME type without parameters ("text/html; charset=utf-8" -> "text/html")
+    mime = (content_type or "").partition(";")[0].strip().lower()
+    extract = _MIME_EXTRACTORS.get(mime)
+    if extract is None:
+        extract = _SUFFIX_EXTRACTORS.get(
+            os.path.splitext(filename)[1].lower(), _extract_plaintext
+        )
+    text = extract(data)
     
     return _clean_text(text)
 
 
 def _extract_pdf(data: bytes) -> str:
-    """Extract text from PDF using pypdf."""
+    """Extract text from PDF using PDFium (pypdf fallback)."""
     try:
-        import pypdf
-        reader = pypdf.PdfReader(io.BytesIO(data))
-        pages = [p.extract_text() or "" for p in reader.pages]
-        return "\n".join(pages)
+        try:
+            import pypdfium2 as pdfium
+        except ImportError:
+            import pypdf
+            reader = pypdf.PdfReader(io.BytesIO(data))
+            pages = [p.extract_text() or "" for p in reader.pages]
+            return "\n".join(pages)
+        
+        pdf = pdfium.PdfDocument(data)
+        try:
+            pages = []
+            for page in pdf:
+                textpage = page.get_textpage()
+                try:
+                    pages.append(textpage.get_text_range())
+                finally:
+                    # Release the C-side handles as soon as each page is read
+                    textpage.close()
+                    page.close()
+            return "\n".join(pages)
+        finally:
+            pdf.close()
     except Exception as exc:
         logger.warning("Failed to extract PDF text: %s", exc)
         return ""
@@ -67,13 +83,9 @@ def _extract_docx(data: bytes) -> str:
 
 
 def _extract_html(data: bytes) -> str:
-    """Extract text from HTML using BeautifulSoup."""
+    """Extract text from HTML."""
     try:
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(data, "lxml")
-        for script in soup(["script", "style"]):
-            script.decompose()
-        return soup.get_text(separator="\n", strip=True)
+        return _html_to_text(data)
     except Exception as exc:
         logger.warning("Failed to extract HTML text: %s", exc)
         return ""
@@ -82,16 +94,43 @@ def _extract_html(data: bytes) -> str:
 def _extract_markdown(data: bytes) -> str:
     """Extract text from Markdown."""
     try:
-        import markdown
-        from bs4 import BeautifulSoup
-        html = markdown.markdown(data.decode("utf-8", errors="ignore"))
-        soup = BeautifulSoup(html, "lxml")
-        return soup.get_text(separator="\n", strip=True)
+        html = _markdown_to_html(data.decode("utf-8", errors="ignore"))
+        return _html_to_text(html)
     except Exception as exc:
         logger.warning("Failed to extract Markdown text: %s", exc)
         return ""
 
 
+def _html_to_text(html) -> str:
+    """Strip tags, scripts and styles using selectolax (BeautifulSoup fallback)."""
+    try:
+        from selectolax.lexbor import LexborHTMLParser
+    except ImportError:
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, "lxml")
+        for script in soup(["script", "style"]):
+            script.decompose()
+        return soup.get_text(separator="\n", strip=True)
+    
+    tree = LexborHTMLParser(html)
+    tree.strip_tags(["script", "style"])
+    return tree.root.text(separator="\n", strip=True) if tree.root else ""
+
+
+def _markdown_to_html(text: str) -> str:
+    """Render Markdown to HTML using markdown-it-py (markdown fallback)."""
+    global _markdown_parser
+    if _markdown_parser is None:
+        try:
+            from markdown_it import MarkdownIt
+        except ImportError:
+            import markdown
+            return markdown.markdown(text)
+        # Building the parser compiles its rule chains; do it once per process
+        _markdown_parser = MarkdownIt()
+    return _markdown_parser.render(text)
+
+
 def _extract_plaintext(data: bytes) -> str:
     """Extract text from plain text file."""
     try:
@@ -100,17 +139,38 @@ def _extract_plaintext(data: bytes) -> str:
         return ""
 
 
+# Extractor dispatch: MIME type first, then filename suffix, plain text last.
+# text/plain is left out on purpose so e.g. a .md file sent as text/plain is
+# still rendered as Markdown.
+_MIME_EXTRACTORS = {
+    "application/pdf": _extract_pdf,
+    "application/x-pdf": _extract_pdf,
+    "application/msword": _extract_docx,
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": _extract_docx,
+    "text/html": _extract_html,
+    "application/xhtml+xml": _extract_html,
+    "text/markdown": _extract_markdown,
+    "text/x-markdown": _extract_markdown,
+}
+
+_SUFFIX_EXTRACTORS = {
+    ".pdf": _extract_pdf,
+    ".docx": _extract_docx,
+    ".doc": _extract_docx,
+    ".html": _extract_html,
+    ".htm": _extract_html,
+    ".md": _extract_markdown,
+}
+
+
 def _clean_text(text: str) -> str:
     """Clean extracted text: remove empty lines and control characters."""
     if not text:
         return ""
     
-    # Remove multiple empty lines
-    lines = [line.strip() for line in text.split("\n")]
-    lines = [line for line in lines if line]
-    text = "\n".join(lines)
-    
-    # Remove control characters except newlines
-    text = "".join(char for char in text if char.isprintable() or char == "\n")
+    # Remove control characters first, so lines holding only control
+    # characters become blank and are dropped by the same pass below
+    text = text.translate(_CTRL_TBL)
     
-    return text
+    # Strip every line and drop the empty ones
+    return "\n".join(filter(None, (line.strip() for line in text.split("\n"))))
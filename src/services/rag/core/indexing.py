@@ -1,22 +1,47 @@
 """Indexing operations for Qdrant vector store."""
 
+import asyncio
 import logging
-from typing import Any, Dict, List, Optional
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, List, Optional, Set
 
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, PointStruct, VectorParams
+from qdrant_client.models import (
+    Distance,
+    PointStruct,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    VectorParams,
+)
 
 from ..config import (
-    QDRANT_URL,
     EMBED_COLLECTION_NAME,
     EMBED_COLLECTION_CONTENT,
+    EMBED_BATCH_SIZE,
+    EXTRACT_PROCESSES,
+    INDEX_CONCURRENCY,
+    QDRANT_QUANTIZE,
+    QDRANT_UPSERT_BATCH_SIZE,
+    QDRANT_UPSERT_CONCURRENCY,
+    QDRANT_UPSERT_WAIT,
+    QDRANT_VECTORS_ON_DISK,
 )
 from .embeddings import get_service, embed_text
-from .chunking import chunk_text
+from .chunking import iter_chunks
 from .extraction import extract_text_from_bytes
+from .vector_store import get_client, get_async_client, run_sync
 
 logger = logging.getLogger("rag-server.indexing")
 
+# Collections already known to exist (skips get_collections round-trips)
+_known_collections: Set[str] = set()
+
+# Process pool for text extraction (lazy initialized)
+_extract_pool: Optional[ProcessPoolExecutor] = None
+
 
 def ensure_collection(
     client: QdrantClient, 
@@ -24,6 +49,9 @@ def ensure_collection(
     vector_size: Optional[int] = None
 ) -> None:
     """Ensure Qdrant collection exists with appropriate vector size."""
+    if name in _known_collections:
+        return
+    
     collections = client.get_collections().collections
     exists = any(c.name == name for c in collections)
     
@@ -31,11 +59,28 @@ def ensure_collection(
         service = get_service()
         size = vector_size or (service.dimension if service else 1536)
         
+        quantization = (
+            ScalarQuantization(
+                scalar=ScalarQuantizationConfig(type=ScalarType.INT8, always_ram=True)
+            )
+            if QDRANT_QUANTIZE else None
+        )
+        
+        # Searches run on the in-RAM int8 copies; the float32 originals are
+        # only touched to rescore the top candidates, so they can live on disk
+        on_disk = QDRANT_QUANTIZE and QDRANT_VECTORS_ON_DISK
+        
         client.create_collection(
             collection_name=name,
-            vectors_config=VectorParams(size=size, distance=Distance.COSINE),
+            vectors_config=VectorParams(size=size, distance=Distance.COSINE, on_disk=on_disk),
+            quantization_config=quantization,
         )
-        logger.info(f"Created Qdrant collection '{name}' with size {size}")
+        logger.info(
+            f"Created Qdrant collection '{name}' with size {size} "
+            f"(int8 quantization={QDRANT_QUANTIZE}, vectors on disk={on_disk})"
+        )
+    
+    _known_collections.add(name)
 
 
 def index_filename(payload: Dict[str, Any]) -> bool:
@@ -49,7 +94,7 @@ def index_filename(payload: Dict[str, Any]) -> bool:
         True if successful, False otherwise.
     """
     try:
-        client = QdrantClient(url=QDRANT_URL)
+        client = get_client()
         ensure_collection(client, EMBED_COLLECTION_NAME)
         
         vector = embed_text(payload.get("filename", ""))
@@ -66,7 +111,11 @@ def index_filename(payload: Dict[str, Any]) -> bool:
             },
         )
         
-        client.upsert(collection_name=EMBED_COLLECTION_NAME, points=[point])
+        client.upsert(
+            collection_name=EMBED_COLLECTION_NAME,
+            points=[point],
+            wait=QDRANT_UPSERT_WAIT,
+        )
         logger.info(f"Indexed filename for file_id={payload['id']}")
         return True
         
@@ -79,10 +128,31 @@ def index_content(
     payload: Dict[str, Any], 
     data: bytes, 
     content_type: str
+) -> Dict[str, Any]:
+    """
+    Index document content chunks in Qdrant (sync wrapper).
+    
+    Must not be called from a running event loop; async callers should await
+    index_content_async directly.
+    """
+    return run_sync(index_content_async(payload, data, content_type))
+
+
+async def index_content_async(
+    payload: Dict[str, Any], 
+    data: bytes, 
+    content_type: str
 ) -> Dict[str, Any]:
     """
     Index document content chunks in Qdrant.
     
+    Chunks are streamed from the chunker and embedded in mini-batches of
+    EMBED_BATCH_SIZE, with up to INDEX_CONCURRENCY batches in flight (each
+    until its points are stored). Their points are upserted in
+    batches of QDRANT_UPSERT_BATCH_SIZE with at most QDRANT_UPSERT_CONCURRENCY
+    upserts in flight, so embedding and upsert calls overlap without flooding
+    Qdrant with concurrent writes.
+    
     Args:
         payload: Dict with file metadata
         data: Raw file bytes
@@ -101,8 +171,8 @@ def index_content(
     filename = payload.get("filename", "unknown")
     file_id = payload.get("id", 0)
     
-    # Extract text
-    text = extract_text_from_bytes(data, content_type, filename)
+    # Extract text (CPU-bound parsing, kept off the event loop and the GIL)
+    text = await _extract_text(data, content_type, filename)
     
     # Validate content
     if not text or len(text.strip()) < 10:
@@ -115,47 +185,144 @@ def index_content(
     
     logger.info(f"Extracted {len(text)} chars from {filename}")
     
-    # Chunk text
-    chunks = chunk_text(text)
-    if not chunks:
-        result["error"] = f"No chunks generated from {filename}"
-        return result
-    
     try:
-        client = QdrantClient(url=QDRANT_URL)
-        ensure_collection(client, EMBED_COLLECTION_CONTENT)
+        await asyncio.to_thread(ensure_collection, get_client(), EMBED_COLLECTION_CONTENT)
+        client = get_async_client()
+        semaphore = asyncio.Semaphore(INDEX_CONCURRENCY)
+        upsert_semaphore = asyncio.Semaphore(QDRANT_UPSERT_CONCURRENCY)
+        unique_texts = 0
         
-        points = []
-        for chunk_data in chunks:
-            chunk_text_str = chunk_data["text"]
-            vector = embed_text(chunk_text_str)
-            
-            point = PointStruct(
-                id=file_id * 1000 + chunk_data["chunk_index"],
-                vector=vector,
-                payload={
-                    "file_id": file_id,
-                    "filename": filename,
-                    "path": payload.get("stored_path"),
-                    "size_bytes": payload.get("size_bytes"),
-                    "content_type": payload.get("content_type"),
-                    "created_at": payload.get("created_at"),
-                    "chunk": chunk_text_str[:300],
-                    "chunk_index": chunk_data["chunk_index"],
-                    "total_chunks": chunk_data["total_chunks"],
-                    "chunk_type": chunk_data["type"],
-                },
-            )
-            points.append(point)
+        async def embed_and_upsert(window: List[Dict[str, Any]]) -> int:
+            nonlocal unique_texts
+            # The window's slot is held until its points are upserted, so
+            # windows waiting on upsert_semaphore still count towards
+            # INDEX_CONCURRENCY
+            try:
+                # Group chunks by text so repeated boilerplate (headers,
+                # footers, disclaimers) is embedded once; every chunk still
+                # gets its own point. Repeats across windows hit the
+                # embedding cache.
+                by_text: Dict[str, List[Dict[str, Any]]] = {}
+                for chunk_data in window:
+                    by_text.setdefault(chunk_data["text"], []).append(chunk_data)
+                unique_texts += len(by_text)
+                vectors = await service.aembed_batch(list(by_text))
+                points = [
+                    _content_point(payload, chunk_data, vector)
+                    for chunk_group, vector in zip(by_text.values(), vectors)
+                    for chunk_data in chunk_group
+                ]
+                for i in range(0, len(points), QDRANT_UPSERT_BATCH_SIZE):
+                    async with upsert_semaphore:
+                        await client.upsert(
+                            collection_name=EMBED_COLLECTION_CONTENT,
+                            points=points[i:i + QDRANT_UPSERT_BATCH_SIZE],
+                            wait=QDRANT_UPSERT_WAIT,
+                        )
+                return len(points)
+            finally:
+                semaphore.release()
         
-        client.upsert(collection_name=EMBED_COLLECTION_CONTENT, points=points)
-        logger.info(f"Indexed {len(points)} chunks for file_id={file_id}")
+        # Stream chunks straight into embedding windows: a new window is only
+        # cut once an earlier one is fully upserted, so at most
+        # INDEX_CONCURRENCY windows of chunks and points are held in memory
+        # instead of the whole chunk list
+        chunks = iter_chunks(text)
+        tasks = []
+        try:
+            while True:
+                await semaphore.acquire()
+                window = list(islice(chunks, EMBED_BATCH_SIZE))
+                if not window:
+                    semaphore.release()
+                    break
+                tasks.append(asyncio.create_task(embed_and_upsert(window)))
+            indexed = sum(await asyncio.gather(*tasks))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        
+        if not indexed:
+            result["error"] = f"No chunks generated from {filename}"
+            return result
+        
+        # The chunk count is only known at the end of the stream. Qdrant
+        # applies updates in order, so waiting on this one means every
+        # earlier (unwaited) upsert is applied before the job is marked done.
+        await client.set_payload(
+            collection_name=EMBED_COLLECTION_CONTENT,
+            payload={"total_chunks": indexed},
+            points=[_content_point_id(file_id, i) for i in range(indexed)],
+            wait=True,
+        )
+        
+        if unique_texts < indexed:
+            logger.info(f"Embedded {unique_texts} unique texts for {indexed} chunks")
+        logger.info(f"Indexed {indexed} chunks for file_id={file_id}")
         
         result["success"] = True
-        result["chunks_indexed"] = len(points)
+        result["chunks_indexed"] = indexed
         return result
         
     except Exception as exc:
         logger.warning(f"Failed to index content: {exc}")
         result["error"] = str(exc)
         return result
+
+
+async def _extract_text(data: bytes, content_type: str, filename: str) -> str:
+    """Run extract_text_from_bytes in the extraction process pool."""
+    global _extract_pool
+    if EXTRACT_PROCESSES <= 0:
+        return await asyncio.to_thread(extract_text_from_bytes, data, content_type, filename)
+    if _extract_pool is None:
+        # forkserver children start from a clean process, not a fork of this
+        # one with its event loop, gRPC channels and worker threads
+        _extract_pool = ProcessPoolExecutor(
+            max_workers=EXTRACT_PROCESSES,
+            mp_context=multiprocessing.get_context("forkserver"),
+        )
+        logger.info(f"Extraction pool started with {EXTRACT_PROCESSES} processes")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _extract_pool, extract_text_from_bytes, data, content_type, filename
+    )
+
+
+def shutdown_extract_pool() -> None:
+    """Stop the extraction worker processes."""
+    global _extract_pool
+    if _extract_pool is not None:
+        _extract_pool.shutdown(cancel_futures=True)
+        _extract_pool = None
+
+
+def _content_point(
+    payload: Dict[str, Any],
+    chunk_data: Dict[str, Any],
+    vector: List[float],
+) -> PointStruct:
+    """Build the Qdrant point for one content chunk."""
+    file_id = payload.get("id", 0)
+    return PointStruct(
+        id=_content_point_id(file_id, chunk_data["chunk_index"]),
+        vector=vector,
+        payload={
+            "file_id": file_id,
+            "filename": payload.get("filename", "unknown"),
+            "path": payload.get("stored_path"),
+            "size_bytes": payload.get("size_bytes"),
+            "content_type": payload.get("content_type"),
+            "created_at": payload.get("created_at"),
+            "chunk": chunk_data["text"][:300],
+            "chunk_index": chunk_data["chunk_index"],
+            "total_chunks": chunk_data.get("total_chunks"),
+            "chunk_type": chunk_data["type"],
+        },
+    )
+
+
+def _content_point_id(file_id: int, chunk_index: int) -> int:
+    """Point id of a content chunk."""
+    return file_id * 1000 + chunk_index
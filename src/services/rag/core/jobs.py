@@ -0,0 +1,166 @@
+"""Background indexing jobs."""
+
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import DATABASE_URL, INDEX_WORKERS
+from .db import execute_prepared, get_connection, prepare_statement
+from .indexing import index_filename, index_content_async
+
+logger = logging.getLogger("rag-server.jobs")
+
+# (job_id, upload payload, content type)
+IndexJob = Tuple[int, Dict[str, Any], str]
+
+prepare_statement(
+    "upd_index_job",
+    "UPDATE index_jobs SET status = $1, chunks_indexed = $2, error = $3, "
+    "updated_at = NOW() WHERE id = $4",
+)
+
+# Queue and worker tasks (created on application startup)
+_queue: Optional["asyncio.Queue[IndexJob]"] = None
+_workers: List[asyncio.Task] = []
+
+
+def enqueue_index_job(job_id: int, payload: Dict[str, Any], content_type: str) -> None:
+    """
+    Queue an upload for background indexing.
+
+    Args:
+        job_id: Row id in index_jobs (already committed as 'queued')
+        payload: Dict with file metadata, including stored_path
+        content_type: MIME type
+    """
+    if _queue is None:
+        raise RuntimeError("Indexing workers are not running")
+    _queue.put_nowait((job_id, payload, content_type))
+
+
+async def start_workers(num_workers: int = INDEX_WORKERS) -> None:
+    """Start the indexing workers and re-queue jobs left over from a previous run."""
+    global _queue
+    _queue = asyncio.Queue()
+
+    if DATABASE_URL:
+        try:
+            for job in await asyncio.to_thread(_pending_jobs):
+                _queue.put_nowait(job)
+        except Exception as exc:
+            logger.warning(f"Could not load pending index jobs: {exc}")
+
+    for _ in range(num_workers):
+        _workers.append(asyncio.create_task(_run_worker(_queue)))
+    logger.info(f"Started {num_workers} indexing workers ({_queue.qsize()} pending jobs)")
+
+
+async def stop_workers() -> None:
+    """Cancel the indexing workers. Unfinished jobs stay queued in the DB."""
+    global _queue
+    for worker in _workers:
+        worker.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _queue = None
+
+
+def get_index_status(upload_id: int) -> Optional[Tuple[str, Optional[int], Optional[str], Any]]:
+    """
+    Get the state of the latest indexing job for an upload.
+
+    Returns:
+        Tuple of (status, chunks_indexed, error, updated_at), or None if the
+        upload has no indexing job.
+    """
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT status, chunks_indexed, error, updated_at
+                FROM index_jobs
+                WHERE upload_id = %s
+                ORDER BY id DESC
+                LIMIT 1;
+                """,
+                (upload_id,),
+            )
+            return cur.fetchone()
+
+
+async def _run_worker(queue: "asyncio.Queue[IndexJob]") -> None:
+    """Process indexing jobs until cancelled."""
+    while True:
+        job_id, payload, content_type = await queue.get()
+        try:
+            await _process_job(job_id, payload, content_type)
+        except Exception as exc:
+            logger.error(f"Index job {job_id} crashed: {exc}")
+        finally:
+            queue.task_done()
+
+
+async def _process_job(job_id: int, payload: Dict[str, Any], content_type: str) -> None:
+    """Index one stored upload and record the outcome in index_jobs."""
+    await asyncio.to_thread(_update_job, job_id, "running")
+
+    try:
+        data = await asyncio.to_thread(Path(payload["stored_path"]).read_bytes)
+        await asyncio.to_thread(index_filename, payload)
+        result = await index_content_async(payload, data, content_type)
+    except Exception as exc:
+        result = {"success": False, "chunks_indexed": 0, "error": str(exc)}
+
+    status = "done" if result["success"] else "failed"
+    await asyncio.to_thread(
+        _update_job, job_id, status, result["chunks_indexed"], result["error"]
+    )
+    logger.info(f"Index job {job_id} {status}: {payload.get('filename')}")
+
+
+def _update_job(
+    job_id: int,
+    status: str,
+    chunks_indexed: Optional[int] = None,
+    error: Optional[str] = None,
+) -> None:
+    """Set the status of an indexing job."""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            execute_prepared(
+                cur, "upd_index_job", (status, chunks_indexed, error, job_id)
+            )
+
+
+def _pending_jobs() -> List[IndexJob]:
+    """Load jobs that were queued or running when the server last stopped."""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT j.id, u.id, u.filename, u.path, u.size_bytes,
+                       u.content_type, u.created_at
+                FROM index_jobs j
+                JOIN uploads u ON u.id = j.upload_id
+                WHERE j.status IN ('queued', 'running')
+                ORDER BY j.id;
+                """
+            )
+            rows = cur.fetchall()
+
+    return [
+        (
+            job_id,
+            {
+                "id": upload_id,
+                "filename": filename,
+                "stored_path": path,
+                "size_bytes": size_bytes,
+                "content_type": content_type,
+                "created_at": created_at.isoformat(),
+            },
+            content_type or "",
+        )
+        for job_id, upload_id, filename, path, size_bytes, content_type, created_at in rows
+    ]
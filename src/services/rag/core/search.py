@@ -1,22 +1,91 @@
 """Search operations including vector search, reranking, and RRF."""
 
+import asyncio
+import contextlib
 import logging
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
-from qdrant_client import QdrantClient
+import numpy as np
+from qdrant_client.models import QuantizationSearchParams, SearchParams
 
 from ..config import (
-    QDRANT_URL,
     EMBED_COLLECTION_NAME,
     EMBED_COLLECTION_CONTENT,
     DEFAULT_SEARCH_LIMIT,
     DEFAULT_RERANK_TOP_K,
+    RERANK_MODEL,
+    RERANK_BATCH_SIZE,
     RRF_K,
+    QDRANT_HNSW_EF,
+    QDRANT_QUANTIZE,
+    QDRANT_OVERSAMPLING,
+    USE_FP16,
 )
-from .embeddings import embed_text
+from .embeddings import embed_text, get_service
+from .vector_store import get_client, get_async_client, run_sync
 
 logger = logging.getLogger("rag-server.search")
 
+# Payload fields read back from search hits (projected server-side)
+_RESULT_FIELDS = [
+    "file_id",
+    "filename",
+    "chunk",
+    "chunk_index",
+    "chunk_type",
+    "created_at",
+    "content_type",
+    "size_bytes",
+]
+
+# Search over int8 vectors, then rescore the oversampled top hits with the
+# original float vectors to recover recall
+_SEARCH_PARAMS = SearchParams(
+    hnsw_ef=QDRANT_HNSW_EF,
+    exact=False,
+    quantization=(
+        QuantizationSearchParams(rescore=True, oversampling=QDRANT_OVERSAMPLING)
+        if QDRANT_QUANTIZE else None
+    ),
+)
+
+# Global reranker instance (lazy initialized)
+_reranker: Optional[Any] = None
+_reranker_lock = threading.Lock()
+
+
+def _get_reranker() -> Any:
+    """
+    Get or load the cross-encoder reranker.
+    
+    Thread-safe: concurrent reranks on a cold process load the model once.
+    
+    Raises:
+        ImportError: If sentence-transformers is not installed.
+    """
+    global _reranker
+    if _reranker is None:
+        with _reranker_lock:
+            if _reranker is None:
+                import torch
+                from sentence_transformers import CrossEncoder
+                
+                device = "cuda" if torch.cuda.is_available() else "cpu"
+                _reranker = CrossEncoder(RERANK_MODEL, device=device, max_length=256)
+                logger.info(f"Reranker loaded: {RERANK_MODEL} on {device}")
+    return _reranker
+
+
+def _rerank_precision() -> contextlib.AbstractContextManager:
+    """Autocast to float16 for reranking on CUDA when USE_FP16 is enabled."""
+    if USE_FP16:
+        import torch
+        if torch.cuda.is_available():
+            return torch.autocast(device_type="cuda", dtype=torch.float16)
+    return contextlib.nullcontext()
+
 
 def vector_search(
     query: str,
@@ -35,34 +104,77 @@ def vector_search(
         List of results with score and payload.
     """
     try:
-        client = QdrantClient(url=QDRANT_URL)
         query_vector = embed_text(query)
+    except Exception as exc:
+        logger.warning(f"Vector search failed: {exc}")
+        return []
+    
+    return _vector_search_with_vec(query_vector, collection, limit)
+
+
+def _vector_search_with_vec(
+    query_vector: List[float],
+    collection: str,
+    limit: int,
+) -> List[Dict[str, Any]]:
+    """Vector similarity search with an already computed query vector."""
+    try:
+        client = get_client()
         
         results = client.search(
             collection_name=collection,
             query_vector=query_vector,
             limit=limit,
+            with_payload=_RESULT_FIELDS,
+            with_vectors=False,
+            search_params=_SEARCH_PARAMS,
         )
         
-        return [
-            {
-                "id": hit.payload.get("file_id", hit.id),
-                "filename": hit.payload.get("filename"),
-                "chunk": hit.payload.get("chunk", ""),
-                "chunk_index": hit.payload.get("chunk_index", 0),
-                "chunk_type": hit.payload.get("chunk_type", "unknown"),
-                "score": hit.score,
-                "created_at": hit.payload.get("created_at"),
-                "content_type": hit.payload.get("content_type"),
-                "size_bytes": hit.payload.get("size_bytes"),
-            }
-            for hit in results
-        ]
+        return [_hit_to_result(hit) for hit in results]
     except Exception as exc:
         logger.warning(f"Vector search failed: {exc}")
         return []
 
 
+async def _avector_search_with_vec(
+    query_vector: List[float],
+    collection: str,
+    limit: int,
+) -> List[Dict[str, Any]]:
+    """Async variant of _vector_search_with_vec using the async Qdrant client."""
+    try:
+        client = get_async_client()
+        
+        results = await client.search(
+            collection_name=collection,
+            query_vector=query_vector,
+            limit=limit,
+            with_payload=_RESULT_FIELDS,
+            with_vectors=False,
+            search_params=_SEARCH_PARAMS,
+        )
+        
+        return [_hit_to_result(hit) for hit in results]
+    except Exception as exc:
+        logger.warning(f"Vector search failed: {exc}")
+        return []
+
+
+def _hit_to_result(hit) -> Dict[str, Any]:
+    """Convert a Qdrant hit into a search result dict."""
+    return {
+        "id": hit.payload.get("file_id", hit.id),
+        "filename": hit.payload.get("filename"),
+        "chunk": hit.payload.get("chunk", ""),
+        "chunk_index": hit.payload.get("chunk_index", 0),
+        "chunk_type": hit.payload.get("chunk_type", "unknown"),
+        "score": hit.score,
+        "created_at": hit.payload.get("created_at"),
+        "content_type": hit.payload.get("content_type"),
+        "size_bytes": hit.payload.get("size_bytes"),
+    }
+
+
 def search_filenames(query: str, limit: int = 10) -> List[Dict[str, Any]]:
     """Search by filename similarity."""
     return vector_search(query, EMBED_COLLECTION_NAME, limit)
@@ -93,18 +205,18 @@ def rerank_results(
         return []
     
     try:
-        from sentence_transformers import CrossEncoder
-        
-        reranker = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
+        reranker = _get_reranker()
         
         # Prepare pairs
-        pairs = []
-        for r in results:
-            text = r.get("chunk") or r.get("filename") or ""
-            pairs.append([query, text])
+        pairs = [(query, r.get("chunk") or r.get("filename") or "") for r in results]
         
         # Get rerank scores
-        scores = reranker.predict(pairs)
+        with _rerank_precision():
+            scores = reranker.predict(
+                pairs,
+                batch_size=RERANK_BATCH_SIZE,
+                show_progress_bar=False,
+            )
         
         # Add scores and sort
         for i, r in enumerate(results):
@@ -125,6 +237,7 @@ def rerank_results(
 def reciprocal_rank_fusion(
     results_list: List[List[Dict[str, Any]]],
     k: int = RRF_K,
+    limit: Optional[int] = None,
 ) -> List[Dict[str, Any]]:
     """
     Fuse multiple result lists using Reciprocal Rank Fusion.
@@ -134,42 +247,77 @@ def reciprocal_rank_fusion(
     Args:
         results_list: List of result lists to fuse
         k: RRF constant (default 60)
+        limit: Only return the top `limit` fused results (all if None)
     
     Returns:
         Fused and sorted results.
     """
-    fused_scores: Dict[int, float] = {}
-    doc_data: Dict[int, Dict[str, Any]] = {}
+    lists = [results for results in results_list if results]
+    if not lists:
+        return []
+    
+    docs = [doc for results in lists for doc in results]
+    raw_scores = np.fromiter(
+        (doc.get("score") or 0 for doc in docs), dtype=np.float64, count=len(docs)
+    )
+    ranks = np.concatenate([np.arange(len(results)) for results in lists])
+    
+    # Number document ids (ints, UUIDs, strings...) in order of first
+    # appearance, then group-sum 1 / (rank + k) per id
+    codes: Dict[Any, int] = {}
+    group = np.fromiter(
+        (codes.setdefault(doc.get("id", 0), len(codes)) for doc in docs),
+        dtype=np.intp,
+        count=len(docs),
+    )
+    fused_scores = np.bincount(group, weights=1.0 / (ranks + k), minlength=len(codes))
     
-    for results in results_list:
-        for rank, doc in enumerate(results):
-            doc_id = doc.get("id", 0)
-            score = 1 / (rank + k)
-            fused_scores[doc_id] = fused_scores.get(doc_id, 0) + score
-            
-            # Keep the best scoring version of each doc
-            if doc_id not in doc_data or doc.get("score", 0) > doc_data[doc_id].get("score", 0):
-                doc_data[doc_id] = doc
+    # Keep the best scoring version of each doc (first one wins ties),
+    # found in linear passes: per-group max, then first position reaching it
+    best_raw = np.full(len(fused_scores), -np.inf)
+    np.maximum.at(best_raw, group, raw_scores)
+    is_best = raw_scores == best_raw[group]
+    best_doc = np.full(len(fused_scores), len(docs))
+    np.minimum.at(best_doc, group[is_best], np.flatnonzero(is_best))
     
-    # Create final results
-    final_results = []
-    for doc_id, rrf_score in sorted(fused_scores.items(), key=lambda x: x[1], reverse=True):
-        doc = doc_data[doc_id].copy()
-        doc["rrf_score"] = rrf_score
-        doc["score"] = rrf_score  # Use RRF as primary score
-        final_results.append(doc)
+    # Select the top `limit` candidates in O(n), keeping every doc tied with
+    # the cut-off so the final order is exactly that of a full sort
+    candidates = np.arange(len(fused_scores))
+    if limit is not None and limit < len(fused_scores):
+        cutoff = np.partition(fused_scores, -limit)[-limit]
+        candidates = np.flatnonzero(fused_scores >= cutoff)
     
-    return final_results
+    # Sort by RRF score, ties keep first-appearance order (the id codes)
+    order = candidates[np.lexsort((candidates, -fused_scores[candidates]))][:limit]
+    
+    return [
+        {**docs[i], "rrf_score": score, "score": score}  # Use RRF as primary score
+        for i, score in zip(best_doc[order].tolist(), fused_scores[order].tolist())
+    ]
 
 
 def hybrid_search(
     query: str,
     limit: int = DEFAULT_SEARCH_LIMIT,
     rerank: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Synchronous wrapper around hybrid_search_async for non-async callers.
+    """
+    return run_sync(hybrid_search_async(query, limit, rerank))
+
+
+async def hybrid_search_async(
+    query: str,
+    limit: int = DEFAULT_SEARCH_LIMIT,
+    rerank: bool = True,
 ) -> List[Dict[str, Any]]:
     """
     Perform hybrid search combining content and filename search.
     
+    The query is embedded once and both collections are searched
+    concurrently, so latency is that of the slower search, not their sum.
+    
     Args:
         query: Search query
         limit: Max results
@@ -178,20 +326,200 @@ def hybrid_search(
     Returns:
         Combined and deduplicated results.
     """
-    # Search both collections
-    content_results = search_content(query, limit * 2)
-    filename_results = search_filenames(query, limit)
+    try:
+        query_vector = (await get_service().aembed_batch([query]))[0]
+    except Exception as exc:
+        logger.warning(f"Hybrid search failed to embed query: {exc}")
+        return []
     
-    # Mark filename matches
-    filename_ids = {r["id"] for r in filename_results}
-    for r in content_results:
-        r["name_match"] = r["id"] in filename_ids
+    content_results, filename_results = await _asearch_collections(query_vector, limit)
+    
+    # Fusion is cheap; reranking is CPU/GPU bound, keep it off the event loop
+    return await asyncio.to_thread(
+        _fuse_and_rerank, query, content_results, filename_results, limit, rerank
+    )
+
+
+async def hybrid_search_batch_async(
+    queries: List[str],
+    limit: int = DEFAULT_SEARCH_LIMIT,
+    rerank: bool = True,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Perform hybrid search for several queries at once.
     
-    # Fuse results
-    fused = reciprocal_rank_fusion([content_results, filename_results])
+    All queries are embedded with a single batched model call; the collection
+    searches and reranking of the individual queries then run concurrently.
+    
+    Args:
+        queries: Search queries
+        limit: Max results per query
+        rerank: Whether to apply reranking
+    
+    Returns:
+        One result list per query, in the order of `queries`.
+    """
+    try:
+        query_vectors = await get_service().aembed_batch(list(queries))
+    except Exception as exc:
+        logger.warning(f"Batch hybrid search failed to embed queries: {exc}")
+        return [[] for _ in queries]
+    
+    hits = await asyncio.gather(
+        *(_asearch_collections(vector, limit) for vector in query_vectors)
+    )
+    return await asyncio.gather(*(
+        asyncio.to_thread(_fuse_and_rerank, query, content_results, filename_results, limit, rerank)
+        for query, (content_results, filename_results) in zip(queries, hits)
+    ))
+
+
+async def compare_rerank_async(
+    query: str,
+    limit: int = DEFAULT_SEARCH_LIMIT,
+) -> Dict[str, Any]:
+    """
+    Compare the hybrid search ranking with and without reranking.
+    
+    Retrieval and fusion run once; the reranker then scores the same fused
+    candidates, so this costs one search instead of two.
+    
+    Args:
+        query: Search query
+        limit: Max results per ranking
+    
+    Returns:
+        Dict with order_changed, top_filename, top_filename_rerank,
+        original_score, rerank_score, num_results, num_results_rerank and the
+        query's own timings: embed_ms (embedding; a share of the batch call
+        when queries are embedded together), retrieval_ms (vector searches
+        and fusion) and rerank_ms (reranking).
+    """
+    return (await compare_rerank_batch_async([query], limit))[0]
+
+
+async def compare_rerank_batch_async(
+    queries: List[str],
+    limit: int = DEFAULT_SEARCH_LIMIT,
+) -> List[Dict[str, Any]]:
+    """
+    Compare rankings with and without reranking for several queries at once.
+    
+    Like hybrid_search_batch_async, all queries are embedded in one call;
+    each query reports an equal share of that call as its embed_ms. If the
+    embedding fails, every query gets an empty comparison, just as the batch
+    search degrades to empty results.
+    
+    Returns:
+        One dict as returned by compare_rerank_async per query.
+    """
+    start = time.perf_counter()
+    try:
+        query_vectors = await get_service().aembed_batch(list(queries))
+    except Exception as exc:
+        logger.warning(f"Batch rerank comparison failed to embed queries: {exc}")
+        return [_compare_rerank(query, [], [], limit) for query in queries]
+    embed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    
+    async def search(vector: List[float]) -> Tuple[Any, float]:
+        start = time.perf_counter()
+        hits = await _asearch_collections(vector, limit)
+        return hits, (time.perf_counter() - start) * 1000
+    
+    searches = await asyncio.gather(*(search(vector) for vector in query_vectors))
+    comparisons = await asyncio.gather(*(
+        asyncio.to_thread(
+            _compare_rerank, query, content_results, filename_results, limit, search_ms
+        )
+        for query, ((content_results, filename_results), search_ms) in zip(queries, searches)
+    ))
+    for comparison in comparisons:
+        comparison["embed_ms"] = embed_ms
+    return comparisons
+
+
+async def _asearch_collections(
+    query_vector: List[float],
+    limit: int,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Search the content and filename collections concurrently.
+    
+    Returns:
+        Tuple of (content results, filename results).
+    """
+    return await asyncio.gather(
+        _avector_search_with_vec(query_vector, EMBED_COLLECTION_CONTENT, limit * 2),
+        _avector_search_with_vec(query_vector, EMBED_COLLECTION_NAME, limit),
+    )
+
+
+def _fuse_and_rerank(
+    query: str,
+    content_results: List[Dict[str, Any]],
+    filename_results: List[Dict[str, Any]],
+    limit: int,
+    rerank: bool,
+) -> List[Dict[str, Any]]:
+    """Fuse content and filename hits with RRF and optionally rerank."""
+    # The reranker scores every fused candidate; only the plain ranking
+    # can stop at the top `limit`
+    fused = _fuse(content_results, filename_results, None if rerank else limit)
     
     # Optionally rerank
     if rerank and fused:
         fused = rerank_results(query, fused, limit)
     
     return fused[:limit]
+
+
+def _compare_rerank(
+    query: str,
+    content_results: List[Dict[str, Any]],
+    filename_results: List[Dict[str, Any]],
+    limit: int,
+    search_ms: float = 0.0,
+) -> Dict[str, Any]:
+    """
+    Rank fused hits with and without reranking and summarize the difference.
+    
+    `search_ms` is the time the vector searches took; retrieval_ms adds the
+    fusion time to it.
+    """
+    start = time.perf_counter()
+    fused = _fuse(content_results, filename_results)
+    
+    # The RRF top `limit` is a prefix of the full fused list, which is reranked
+    plain = fused[:limit]
+    retrieval_ms = search_ms + (time.perf_counter() - start) * 1000
+    
+    start = time.perf_counter()
+    reranked = rerank_results(query, fused, limit) if fused else []
+    rerank_ms = (time.perf_counter() - start) * 1000
+    
+    top = plain[0] if plain else {}
+    top_rerank = reranked[0] if reranked else {}
+    return {
+        "order_changed": bool(top and top_rerank) and top.get("filename") != top_rerank.get("filename"),
+        "top_filename": top.get("filename"),
+        "top_filename_rerank": top_rerank.get("filename"),
+        "original_score": top_rerank.get("original_score"),
+        "rerank_score": top_rerank.get("rerank_score"),
+        "num_results": len(plain),
+        "num_results_rerank": len(reranked),
+        "retrieval_ms": retrieval_ms,
+        "rerank_ms": rerank_ms,
+    }
+
+
+def _fuse(
+    content_results: List[Dict[str, Any]],
+    filename_results: List[Dict[str, Any]],
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Mark filename matches and fuse content and filename hits with RRF (top `limit`, or all)."""
+    filename_ids = {r["id"] for r in filename_results}
+    for r in content_results:
+        r["name_match"] = r["id"] in filename_ids
+    
+    return reciprocal_rank_fusion([content_results, filename_results], limit=limit)
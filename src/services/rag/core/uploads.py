@@ -0,0 +1,278 @@
+"""Upload bookkeeping in Postgres with coalesced inserts."""
+
+import asyncio
+import csv
+import io
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from psycopg2.extras import execute_values
+
+from ..config import UPLOAD_BATCH_MAX, UPLOAD_BATCH_WAIT_MS
+from .db import execute_prepared, get_connection, prepare_statement
+
+logger = logging.getLogger("rag-server.uploads")
+
+# (filename, path, size_bytes, content_type, content_sha)
+UploadRow = Tuple[str, str, int, Optional[str], bytes]
+
+# Single-row inserts (the common case when uploads don't overlap). Uploads
+# whose content hash already exists are skipped and resolved to the stored row.
+prepare_statement(
+    "ins_upload",
+    "INSERT INTO uploads (filename, path, size_bytes, content_type, content_sha) "
+    "VALUES ($1, $2, $3, $4, $5) "
+    "ON CONFLICT (content_sha) DO NOTHING RETURNING id, path, created_at",
+)
+prepare_statement(
+    "ins_index_job",
+    "INSERT INTO index_jobs (upload_id) VALUES ($1) RETURNING upload_id, id",
+)
+
+# Pending inserts and the task flushing them (created on application startup)
+_queue: Optional["asyncio.Queue[Tuple[UploadRow, asyncio.Future]]"] = None
+_coalescer: Optional[asyncio.Task] = None
+
+
+async def record_upload(
+    filename: str,
+    path: str,
+    size_bytes: int,
+    content_type: Optional[str],
+    content_sha: bytes,
+) -> Dict[str, Any]:
+    """
+    Insert an upload row and its queued indexing job.
+
+    Inserts arriving within UPLOAD_BATCH_WAIT_MS of each other are written
+    together with one multi-row INSERT per table, in a single transaction.
+
+    Returns:
+        Dict with id, created_at and job_id of the new rows, or, if a file
+        with the same content_sha is already stored, the existing row with
+        duplicate=True (and a new job_id only if its last indexing failed).
+    """
+    if _queue is None:
+        raise RuntimeError("Upload coalescer is not running")
+    future = asyncio.get_running_loop().create_future()
+    _queue.put_nowait(((filename, path, size_bytes, content_type, content_sha), future))
+    return await future
+
+
+async def start_coalescer() -> None:
+    """Start the task that flushes pending upload inserts."""
+    global _queue, _coalescer
+    _queue = asyncio.Queue()
+    _coalescer = asyncio.create_task(_run_coalescer(_queue))
+
+
+async def stop_coalescer() -> None:
+    """Stop the coalescer task."""
+    global _queue, _coalescer
+    if _coalescer is not None:
+        _coalescer.cancel()
+        await asyncio.gather(_coalescer, return_exceptions=True)
+    _queue = None
+    _coalescer = None
+
+
+async def _run_coalescer(queue: "asyncio.Queue[Tuple[UploadRow, asyncio.Future]]") -> None:
+    """Collect pending inserts into batches and write each batch at once."""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await queue.get()]
+        deadline = loop.time() + UPLOAD_BATCH_WAIT_MS / 1000
+        while len(batch) < UPLOAD_BATCH_MAX:
+            timeout = deadline - loop.time()
+            try:
+                if timeout > 0:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                else:
+                    batch.append(queue.get_nowait())
+            except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                break
+
+        try:
+            results = await asyncio.to_thread(_insert_uploads, [row for row, _ in batch])
+        except Exception as exc:
+            logger.error(f"Failed to insert {len(batch)} uploads: {exc}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            continue
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+def record_uploads_bulk(rows: List[UploadRow]) -> List[Dict[str, Any]]:
+    """
+    Insert many upload rows at once via COPY, with their queued index jobs.
+
+    The rows are streamed with COPY into a temporary staging table and moved
+    to uploads with a single INSERT ... SELECT, which still returns the
+    generated ids.
+
+    Returns:
+        Dicts as returned by record_upload, in the order of `rows`.
+    """
+    buf = io.StringIO()
+    csv.writer(buf).writerows(
+        (filename, path, size_bytes, content_type, "\\x" + content_sha.hex())
+        for filename, path, size_bytes, content_type, content_sha in rows
+    )
+    buf.seek(0)
+
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                CREATE TEMP TABLE uploads_staging (
+                    filename TEXT, path TEXT, size_bytes BIGINT, content_type TEXT,
+                    content_sha BYTEA
+                ) ON COMMIT DROP;
+                """
+            )
+            cur.copy_expert(
+                """
+                COPY uploads_staging (filename, path, size_bytes, content_type, content_sha)
+                FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (filename, path));
+                """,
+                buf,
+            )
+            cur.execute(
+                """
+                INSERT INTO uploads (filename, path, size_bytes, content_type, content_sha)
+                SELECT filename, path, size_bytes, content_type, content_sha
+                FROM uploads_staging
+                ON CONFLICT (content_sha) DO NOTHING
+                RETURNING id, path, created_at;
+                """
+            )
+            uploads = cur.fetchall()
+            return _insert_jobs(cur, rows, uploads)
+
+
+def _insert_uploads(rows: List[UploadRow]) -> List[Dict[str, Any]]:
+    """
+    Insert upload rows and one queued index job per upload.
+
+    Returns:
+        Dicts as returned by record_upload, in the order of `rows`.
+    """
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            if len(rows) == 1:
+                execute_prepared(cur, "ins_upload", rows[0])
+                uploads = cur.fetchall()
+            else:
+                uploads = execute_values(
+                    cur,
+                    """
+                    INSERT INTO uploads (filename, path, size_bytes, content_type, content_sha)
+                    VALUES %s
+                    ON CONFLICT (content_sha) DO NOTHING
+                    RETURNING id, path, created_at;
+                    """,
+                    rows,
+                    page_size=len(rows),
+                    fetch=True,
+                )
+            return _insert_jobs(cur, rows, uploads)
+
+
+def _insert_jobs(
+    cur,
+    rows: List[UploadRow],
+    uploads: List[Tuple[int, str, Any]],
+) -> List[Dict[str, Any]]:
+    """
+    Insert a queued index job per new upload and pair the ids with `rows`.
+
+    Rows missing from `uploads` were skipped as duplicates and are resolved
+    to the already stored upload with the same content hash. If that upload's
+    latest job failed, a new job is queued for it so the content can be
+    indexed again.
+    """
+    job_ids = _queue_jobs(cur, [upload_id for upload_id, _, _ in uploads])
+
+    # Stored paths are unique, so match rows by path rather than relying on
+    # RETURNING order
+    by_path = {path: (upload_id, created_at) for upload_id, path, created_at in uploads}
+    duplicates = _existing_uploads(
+        cur, [row[4] for row in rows if row[1] not in by_path]
+    )
+    retry_ids = _queue_jobs(
+        cur, [dup["id"] for dup in duplicates.values() if dup["job_status"] == "failed"]
+    )
+    results = []
+    for _, path, _, _, content_sha in rows:
+        if path not in by_path:
+            duplicate = dict(duplicates[content_sha])
+            # Only the first re-upload in the batch gets the retry job
+            duplicate["job_id"] = retry_ids.pop(duplicate["id"], None)
+            results.append(duplicate)
+            continue
+        upload_id, created_at = by_path[path]
+        results.append({
+            "id": upload_id,
+            "created_at": created_at,
+            "job_id": job_ids[upload_id],
+            "duplicate": False,
+        })
+    return results
+
+
+def _queue_jobs(cur, upload_ids: List[int]) -> Dict[int, int]:
+    """Insert a queued index job per upload id; returns job ids by upload id."""
+    if len(upload_ids) == 1:
+        execute_prepared(cur, "ins_index_job", (upload_ids[0],))
+        return dict(cur.fetchall())
+    if upload_ids:
+        return dict(execute_values(
+            cur,
+            "INSERT INTO index_jobs (upload_id) VALUES %s RETURNING upload_id, id;",
+            [(upload_id,) for upload_id in upload_ids],
+            page_size=len(upload_ids),
+            fetch=True,
+        ))
+    return {}
+
+
+def _existing_uploads(cur, shas: List[bytes]) -> Dict[bytes, Dict[str, Any]]:
+    """Look up stored uploads, and the status of their latest job, by content hash."""
+    if not shas:
+        return {}
+    cur.execute(
+        """
+        SELECT u.content_sha, u.id, u.filename, u.path, u.size_bytes,
+               u.content_type, u.created_at, j.status
+        FROM uploads u
+        LEFT JOIN LATERAL (
+            SELECT status FROM index_jobs
+            WHERE upload_id = u.id
+            ORDER BY id DESC
+            LIMIT 1
+        ) j ON TRUE
+        WHERE u.content_sha = ANY(%s);
+        """,
+        (shas,),
+    )
+    return {
+        bytes(content_sha): {
+            "id": upload_id,
+            "filename": filename,
+            "stored_path": path,
+            "size_bytes": size_bytes,
+            "content_type": content_type,
+            "created_at": created_at,
+            "job_status": job_status,
+            "job_id": None,
+            "duplicate": True,
+        }
+        for (
+            content_sha, upload_id, filename, path, size_bytes, content_type, created_at,
+            job_status,
+        ) in cur.fetchall()
+    }
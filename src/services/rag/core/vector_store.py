@@ -0,0 +1,85 @@
+"""Shared Qdrant client."""
+
+import asyncio
+import logging
+import weakref
+from typing import Any, Awaitable, Optional, TypeVar
+
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+from ..config import QDRANT_URL, QDRANT_PREFER_GRPC, QDRANT_GRPC_PORT, QDRANT_TIMEOUT
+from .embeddings import aclose_service
+
+logger = logging.getLogger("rag-server.vector_store")
+
+T = TypeVar("T")
+
+# Global instances (lazy initialized). Async clients are kept per event loop,
+# since their connections are bound to the loop that opened them
+_client: Optional[QdrantClient] = None
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncQdrantClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_client() -> QdrantClient:
+    """
+    Get or create the process-wide Qdrant client.
+    
+    The client keeps its HTTP/gRPC connections open, so reusing it avoids a
+    new connection (and handshake) on every search or upsert.
+    """
+    global _client
+    if _client is None:
+        _client = QdrantClient(
+            url=QDRANT_URL,
+            prefer_grpc=QDRANT_PREFER_GRPC,
+            grpc_port=QDRANT_GRPC_PORT,
+            timeout=QDRANT_TIMEOUT,
+        )
+        logger.info(f"Qdrant client initialized for {QDRANT_URL} (grpc={QDRANT_PREFER_GRPC})")
+    return _client
+
+
+def get_async_client() -> AsyncQdrantClient:
+    """
+    Get or create the async Qdrant client for the running event loop.
+    
+    Async connections are bound to the loop that opened them, so each loop
+    gets its own client; close_async_client releases it.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncQdrantClient(
+            url=QDRANT_URL,
+            prefer_grpc=QDRANT_PREFER_GRPC,
+            grpc_port=QDRANT_GRPC_PORT,
+            timeout=QDRANT_TIMEOUT,
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def close_async_client() -> None:
+    """Close the async Qdrant client of the running event loop, if any."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """
+    Run a coroutine to completion on a new event loop (for sync callers).
+    
+    The async Qdrant and embedding clients opened on that loop are closed
+    before it ends, so repeated calls don't leak connections.
+    """
+    async def run() -> Any:
+        try:
+            return await coro
+        finally:
+            await aclose_service()
+            await close_async_client()
+    
+    return asyncio.run(run())
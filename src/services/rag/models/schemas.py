@@ -14,9 +14,19 @@ class UploadResponse(BaseModel):
     size_bytes: int
     content_type: Optional[str]
     created_at: str
+    sha256: Optional[str] = None
     indexing: Optional[Dict[str, Any]] = None
 
 
+class IndexStatusResponse(BaseModel):
+    """Response model for the indexing status of an upload."""
+    upload_id: int
+    status: str
+    chunks_indexed: Optional[int] = None
+    error: Optional[str] = None
+    updated_at: Optional[str] = None
+
+
 class SearchRequest(BaseModel):
     """Request model for search endpoint."""
     text: str = Field(..., min_length=1, max_length=1000)
@@ -24,6 +34,13 @@ class SearchRequest(BaseModel):
     rerank: bool = Field(default=True)
 
 
+class SearchBatchRequest(BaseModel):
+    """Request model for searching several queries in one call."""
+    queries: List[str] = Field(..., min_length=1, max_length=64)
+    limit: int = Field(default=10, ge=1, le=100)
+    rerank: bool = Field(default=True)
+
+
 class AdvancedSearchRequest(BaseModel):
     """Request model for advanced search with query variants."""
     text: str = Field(..., min_length=1, max_length=1000)
@@ -54,6 +71,34 @@ class SearchResponse(BaseModel):
     results: List[SearchResult]
 
 
+class SearchBatchResponse(BaseModel):
+    """Response model for batch search, one response per query."""
+    responses: List[SearchResponse]
+
+
+class RerankComparisonResponse(BaseModel):
+    """Response model for comparing rankings with and without reranking."""
+    query: str
+    order_changed: bool
+    top_filename: Optional[str] = None
+    top_filename_rerank: Optional[str] = None
+    original_score: Optional[float] = None
+    rerank_score: Optional[float] = None
+    num_results: int = 0
+    num_results_rerank: int = 0
+    embed_ms: float = Field(
+        default=0.0,
+        description="Amortized: the batch embedding time divided by the number of queries",
+    )
+    retrieval_ms: float = 0.0
+    rerank_ms: float = 0.0
+
+
+class RerankComparisonBatchResponse(BaseModel):
+    """Response model for batch rerank comparison, one entry per query."""
+    responses: List[RerankComparisonResponse]
+
+
 class UploadListItem(BaseModel):
     """Item in upload list response."""
     id: int
@@ -5,12 +5,22 @@ from typing import List
 
 from fastapi import APIRouter, HTTPException
 
-from ..core.search import vector_search, hybrid_search, advanced_search as core_advanced_search
+from ..core.search import (
+    vector_search,
+    hybrid_search_async,
+    hybrid_search_batch_async,
+    compare_rerank_async,
+    compare_rerank_batch_async,
+)
 from ..models.schemas import (
     SearchRequest,
+    SearchBatchRequest,
     AdvancedSearchRequest,
     SearchResponse,
+    SearchBatchResponse,
     SearchResult,
+    RerankComparisonResponse,
+    RerankComparisonBatchResponse,
 )
 
 logger = logging.getLogger("rag-server.routes.search")
@@ -24,7 +34,7 @@ async def search(request: SearchRequest):
     Combines content and filename matches with optional reranking.
     """
     try:
-        results = hybrid_search(
+        results = await hybrid_search_async(
             query=request.text,
             limit=request.limit,
             rerank=request.rerank,
@@ -35,7 +45,67 @@ async def search(request: SearchRequest):
             results=[SearchResult(**r) for r in results]
         )
     except Exception as exc:
-        logger.error(f"Search failed: {exc}")
+        logger.exception("Search failed")
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+@router.post("/search/batch", response_model=SearchBatchResponse)
+async def search_batch(request: SearchBatchRequest):
+    """
+    Hybrid search for several queries in one request.
+    All queries are embedded together in a single batched model call.
+    """
+    try:
+        results = await hybrid_search_batch_async(
+            queries=request.queries,
+            limit=request.limit,
+            rerank=request.rerank,
+        )
+        
+        return SearchBatchResponse(responses=[
+            SearchResponse(query=query, results=[SearchResult(**r) for r in query_results])
+            for query, query_results in zip(request.queries, results)
+        ])
+    except Exception as exc:
+        logger.exception("Batch search failed")
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+@router.post("/search/compare_rerank", response_model=RerankComparisonResponse)
+async def compare_rerank(request: SearchRequest):
+    """
+    Compare the top result with and without reranking.
+    Runs retrieval once and returns only the difference (`rerank` is ignored).
+    """
+    try:
+        comparison = await compare_rerank_async(
+            query=request.text,
+            limit=request.limit,
+        )
+        
+        return RerankComparisonResponse(query=request.text, **comparison)
+    except Exception as exc:
+        logger.exception("Rerank comparison failed")
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+@router.post("/search/compare_rerank/batch", response_model=RerankComparisonBatchResponse)
+async def compare_rerank_batch(request: SearchBatchRequest):
+    """
+    Rerank comparison for several queries in one request (`rerank` is ignored).
+    """
+    try:
+        comparisons = await compare_rerank_batch_async(
+            queries=request.queries,
+            limit=request.limit,
+        )
+        
+        return RerankComparisonBatchResponse(responses=[
+            RerankComparisonResponse(query=query, **comparison)
+            for query, comparison in zip(request.queries, comparisons)
+        ])
+    except Exception as exc:
+        logger.exception("Batch rerank comparison failed")
         raise HTTPException(status_code=500, detail=str(exc))
 
 
@@ -58,7 +128,7 @@ async def advanced_search(request: AdvancedSearchRequest):
         # Let's implement a simple version here that reuses hybrid search for now
         # or just call hybrid search until we add LLM support to RAG server config
         
-        results = hybrid_search(
+        results = await hybrid_search_async(
             query=request.text,
             limit=request.limit,
             rerank=True,
@@ -69,5 +139,5 @@ async def advanced_search(request: AdvancedSearchRequest):
             results=[SearchResult(**r) for r in results]
         )
     except Exception as exc:
-        logger.error(f"Advanced search failed: {exc}")
+        logger.exception("Advanced search failed")
         raise HTTPException(status_code=500, detail=str(exc))
@@ -1,74 +1,242 @@
 """Upload routes."""
 
+import asyncio
+import hashlib
 import logging
-import uuid
+import os
+import secrets
 import shutil
-from pathlib import Path
+from pathlib import Path, PurePosixPath
+from typing import Any, BinaryIO, Dict, List, Optional, Set, Tuple
 
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from psycopg2.extras import RealDictCursor
-import psycopg2
 
-from ..config import DATABASE_URL, UPLOAD_DIR
-from ..core.indexing import index_filename, index_content
-from ..models.schemas import UploadResponse
+from ..config import DATABASE_URL, UPLOAD_COPY_CONCURRENCY, UPLOAD_DIR
+from ..core.jobs import enqueue_index_job, get_index_status
+from ..core.uploads import record_upload, record_uploads_bulk
+from ..models.schemas import IndexStatusResponse, UploadResponse
 
 logger = logging.getLogger("rag-server.routes.upload")
 router = APIRouter(tags=["uploads"])
 
+# Read/write size when copying uploads to disk
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Staging buffers reused across uploads, and the slots bounding concurrent copies
+_staging_buffers: List[bytearray] = []
+_copy_slots = asyncio.Semaphore(UPLOAD_COPY_CONCURRENCY)
+
+# Upload shard directories already created by this process
+_created_dirs: Set[Path] = set()
+
 
 @router.post("/upload", response_model=UploadResponse)
 async def upload_file(file: UploadFile = File(...)):
-    """Upload and index a file."""
+    """Upload a file and queue it for indexing."""
     if not DATABASE_URL:
         raise HTTPException(status_code=503, detail="Database not configured")
         
     try:
-        # Read file
-        data = await file.read()
-        size = len(data)
+        # Stream to disk
+        path = _upload_path(file.filename)
+        size, sha256 = await _save_upload(file, path)
+            
+        # Save to DB (batched with concurrent uploads)
+        row = await record_upload(
+            file.filename, str(path), size, file.content_type, bytes.fromhex(sha256)
+        )
         
-        # Save to disk
-        uid = uuid.uuid4().hex
-        safe_name = f"{uid}_{file.filename}"
-        path = UPLOAD_DIR / safe_name
+        if row["duplicate"]:
+            # Same content already stored: drop the new copy
+            await asyncio.to_thread(path.unlink, missing_ok=True)
+            logger.info("Duplicate upload %s matches upload %s", file.filename, row["id"])
+            return _duplicate_payload(row, sha256)
         
-        with open(path, "wb") as f:
-            f.write(data)
-            
-        # Save to DB
-        with psycopg2.connect(DATABASE_URL) as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute(
-                    """
-                    INSERT INTO uploads (filename, path, size_bytes, content_type)
-                    VALUES (%s, %s, %s, %s)
-                    RETURNING id, created_at;
-                    """,
-                    (file.filename, str(path), size, file.content_type),
-                )
-                row = cur.fetchone()
-                conn.commit()
+        # Index in Qdrant in the background
+        payload = _queue_indexing(file, path, size, sha256, row)
         
-        # Prepare response payload
-        payload = {
-            "id": row["id"],
-            "filename": file.filename,
-            "stored_path": str(path),
-            "size_bytes": size,
-            "content_type": file.content_type,
-            "created_at": row["created_at"].isoformat(),
-        }
+        logger.info("File uploaded and queued for indexing: %s", file.filename)
+        return payload
         
-        # Index in Qdrant
-        index_filename(payload)
-        indexing_result = index_content(payload, data, file.content_type or "")
+    except Exception as exc:
+        logger.exception("Upload failed")
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+@router.post("/upload/bulk", response_model=List[UploadResponse])
+async def upload_files_bulk(files: List[UploadFile] = File(...)):
+    """
+    Upload several files at once and queue them for indexing.
+    
+    All metadata rows are written with a single COPY instead of one INSERT
+    per file.
+    """
+    if not DATABASE_URL:
+        raise HTTPException(status_code=503, detail="Database not configured")
+    
+    try:
+        paths = [_upload_path(file.filename) for file in files]
+        saved = await asyncio.gather(
+            *(_save_upload(file, path) for file, path in zip(files, paths))
+        )
         
-        payload["indexing"] = indexing_result
+        rows = await asyncio.to_thread(
+            record_uploads_bulk,
+            [
+                (file.filename, str(path), size, file.content_type, bytes.fromhex(sha256))
+                for file, path, (size, sha256) in zip(files, paths, saved)
+            ],
+        )
         
-        logger.info(f"File uploaded and indexed: {file.filename}")
-        return payload
+        payloads = []
+        for file, path, (size, sha256), row in zip(files, paths, saved, rows):
+            if row["duplicate"]:
+                await asyncio.to_thread(path.unlink, missing_ok=True)
+                payloads.append(_duplicate_payload(row, sha256))
+            else:
+                payloads.append(_queue_indexing(file, path, size, sha256, row))
+        
+        logger.info("Bulk upload of %d files queued for indexing", len(payloads))
+        return payloads
         
     except Exception as exc:
-        logger.error(f"Upload failed: {exc}")
+        logger.exception("Bulk upload failed")
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+def _queue_indexing(
+    file: UploadFile,
+    path: Path,
+    size: int,
+    sha256: str,
+    row: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Build the upload response payload and queue its indexing job."""
+    payload = {
+        "id": row["id"],
+        "filename": file.filename,
+        "stored_path": str(path),
+        "size_bytes": size,
+        "content_type": file.content_type,
+        "created_at": row["created_at"].isoformat(),
+        "sha256": sha256,
+    }
+    enqueue_index_job(row["job_id"], payload, file.content_type or "")
+    payload["indexing"] = {"status": "queued", "job_id": row["job_id"]}
+    return payload
+
+
+def _duplicate_payload(row: Dict[str, Any], sha256: str) -> Dict[str, Any]:
+    """
+    Build the upload response for a file whose content is already stored.
+    
+    If the stored upload's last indexing job failed, `row` carries a new
+    job_id and the stored file is queued for indexing again.
+    """
+    payload = {
+        "id": row["id"],
+        "filename": row["filename"],
+        "stored_path": row["stored_path"],
+        "size_bytes": row["size_bytes"],
+        "content_type": row["content_type"],
+        "created_at": row["created_at"].isoformat(),
+        "sha256": sha256,
+    }
+    if row["job_id"] is None:
+        payload["indexing"] = {"status": "duplicate", "job_id": None}
+        return payload
+    enqueue_index_job(row["job_id"], payload, row["content_type"] or "")
+    payload["indexing"] = {"status": "queued", "job_id": row["job_id"]}
+    return payload
+
+
+def _upload_path(filename: Optional[str]) -> Path:
+    """
+    Unique path on disk for a new upload.
+    
+    Only the last component of the client-supplied name is kept (with either
+    separator), so names like "../../etc/passwd" can't escape UPLOAD_DIR.
+    Files are sharded into UPLOAD_DIR/ab/cd/ by the first hex digits of their
+    random prefix, so no single directory grows large enough to slow down
+    lookups and concurrent creates.
+    """
+    name = PurePosixPath((filename or "upload").replace("\\", "/")).name or "upload"
+    uid = secrets.token_hex(16)
+    subdir = UPLOAD_DIR / uid[:2] / uid[2:4]
+    if subdir not in _created_dirs:
+        subdir.mkdir(parents=True, exist_ok=True)
+        _created_dirs.add(subdir)
+    return subdir / f"{uid}_{name}"
+
+
+async def _save_upload(file: UploadFile, path: Path) -> Tuple[int, str]:
+    """
+    Copy an upload to disk through a reusable UPLOAD_CHUNK_SIZE buffer.
+    
+    The whole copy runs in one worker thread, so the event loop is never
+    blocked and there is a single thread hop per file instead of two per
+    chunk. Staging buffers are recycled between uploads (no per-chunk
+    allocations) and at most UPLOAD_COPY_CONCURRENCY copies run at once.
+    
+    Returns:
+        Tuple of (size in bytes, sha256 hex digest).
+    """
+    async with _copy_slots:
+        buf = _staging_buffers.pop() if _staging_buffers else bytearray(UPLOAD_CHUNK_SIZE)
+        try:
+            return await asyncio.to_thread(_copy_to_disk, file.file, file.size, path, buf)
+        finally:
+            _staging_buffers.append(buf)
+
+
+def _copy_to_disk(
+    src: BinaryIO,
+    declared_size: Optional[int],
+    path: Path,
+    buf: bytearray,
+) -> Tuple[int, str]:
+    """Copy `src` to `path` via `buf`, hashing on the way (see _save_upload)."""
+    view = memoryview(buf)
+    size = 0
+    hasher = hashlib.sha256()
+    with open(path, "wb") as f:
+        if declared_size and hasattr(os, "posix_fallocate"):
+            # Reserve the blocks up front so the filesystem doesn't have to
+            # extend the file (and its metadata) on every chunk
+            try:
+                os.posix_fallocate(f.fileno(), 0, declared_size)
+            except OSError:
+                pass
+        while n := src.readinto(view):
+            chunk = view[:n]
+            f.write(chunk)
+            hasher.update(chunk)
+            size += n
+        if declared_size and declared_size != size:
+            f.truncate(size)
+    return size, hasher.hexdigest()
+
+
+@router.get("/uploads/{upload_id}/index_status", response_model=IndexStatusResponse)
+async def index_status(upload_id: int):
+    """Get the background indexing status of an upload."""
+    if not DATABASE_URL:
+        raise HTTPException(status_code=503, detail="Database not configured")
+    
+    try:
+        job = await asyncio.to_thread(get_index_status, upload_id)
+    except Exception as exc:
+        logger.exception("Index status lookup failed")
         raise HTTPException(status_code=500, detail=str(exc))
+    
+    if job is None:
+        raise HTTPException(status_code=404, detail="No indexing job for this upload")
+    
+    status, chunks_indexed, error, updated_at = job
+    return IndexStatusResponse(
+        upload_id=upload_id,
+        status=status,
+        chunks_indexed=chunks_indexed,
+        error=error,
+        updated_at=updated_at.isoformat() if updated_at else None,
+    )
@@ -7,7 +7,14 @@ from pathlib import Path
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / "src"))
 
-from services.rag.core.chunking import chunk_text, _split_by_paragraphs, _split_by_sentences
+from services.rag.config import CHUNK_SIZE
+from services.rag.core.chunking import (
+    chunk_text,
+    iter_chunks,
+    _split_by_paragraphs,
+    _split_by_sentences,
+    _split_large_segment,
+)
 
 
 class TestChunkText:
@@ -59,6 +66,15 @@ class TestChunkText:
             assert "chunk_index" in chunk
             assert "total_chunks" in chunk
             assert "type" in chunk
+    
+    def test_iter_chunks_streams_same_chunks(self):
+        """iter_chunks yields the same chunks lazily, minus total_chunks."""
+        text = "\n\n".join(f"Párrafo {i}. " + "texto de relleno " * 20 for i in range(20))
+        
+        chunks = iter_chunks(text)
+        
+        assert next(chunks) == {k: v for k, v in chunk_text(text)[0].items() if k != "total_chunks"}
+        assert len(list(chunks)) == len(chunk_text(text)) - 1
 
 
 class TestSplitByParagraphs:
@@ -93,3 +109,32 @@ class TestSplitBySentences:
     def test_multiple_sentences(self):
         result = _split_by_sentences("Primera oración. Segunda oración. Tercera oración.")
         assert len(result) == 3
+    
+    def test_keeps_decimals_and_unterminated_tail(self):
+        result = _split_by_sentences("  Pi vale 3.14 aprox.\n\n¿Seguro?  Sin punto final ")
+        assert result == ["Pi vale 3.14 aprox.", "¿Seguro?", "Sin punto final"]
+
+
+class TestSplitLargeSegment:
+    """Tests for splitting oversized segments."""
+    
+    def test_parts_respect_chunk_size(self):
+        segment = " ".join(f"palabra{i}" for i in range(2000))
+        parts = _split_large_segment(segment)
+        
+        assert len(parts) > 1
+        assert all(len(p) <= CHUNK_SIZE for p in parts)
+    
+    def test_consecutive_parts_overlap(self):
+        segment = " ".join(f"palabra{i}" for i in range(2000))
+        parts = _split_large_segment(segment)
+        
+        for prev, nxt in zip(parts, parts[1:]):
+            assert prev.split()[-1] in nxt.split()
+    
+    def test_all_words_are_kept(self):
+        words = [f"palabra{i}" for i in range(2000)]
+        parts = _split_large_segment(" ".join(words))
+        
+        seen = {w for p in parts for w in p.split()}
+        assert seen == set(words)
@@ -0,0 +1,94 @@
+"""Unit tests for the RAG embedding cache."""
+
+import numpy as np
+import pytest
+import sys
+from pathlib import Path
+from typing import List
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / "src"))
+
+from services.rag.core.embeddings import CachedEmbeddingService, EmbeddingService
+
+
+class FakeEmbeddingService(EmbeddingService):
+    """Deterministic embedding service that records model calls."""
+
+    def __init__(self, name: str = "fake"):
+        self.name = name
+        self.calls: List[List[str]] = []
+
+    def embed(self, text: str) -> List[float]:
+        self.calls.append([text])
+        return [float(len(text)), 1.0]
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+    @property
+    def dimension(self) -> int:
+        return 2
+
+    @property
+    def model_name(self) -> str:
+        return self.name
+
+
+@pytest.fixture
+def inner() -> FakeEmbeddingService:
+    return FakeEmbeddingService()
+
+
+class TestCachedEmbeddingService:
+    """Tests for CachedEmbeddingService."""
+
+    def test_repeated_embed_hits_cache(self, inner):
+        service = CachedEmbeddingService(inner, cache_dir=None)
+
+        first = service.embed("hola")
+        second = service.embed("hola")
+
+        assert first == second == [4.0, 1.0]
+        assert inner.calls == [["hola"]]
+
+    def test_batch_only_sends_unique_misses(self, inner):
+        service = CachedEmbeddingService(inner, cache_dir=None)
+        service.embed("uno")
+
+        result = service.embed_batch(["uno", "dos", "tres", "dos"])
+
+        assert result == [[3.0, 1.0], [3.0, 1.0], [4.0, 1.0], [3.0, 1.0]]
+        assert inner.calls[-1] == ["dos", "tres"]
+
+    def test_lru_evicts_oldest_entry(self, inner):
+        service = CachedEmbeddingService(inner, max_size=2, cache_dir=None)
+        service.embed_batch(["a", "b", "c"])
+        inner.calls.clear()
+
+        service.embed("a")
+        service.embed("c")
+
+        assert inner.calls == [["a"]]
+
+    def test_memory_tier_stores_float32_arrays(self, inner):
+        service = CachedEmbeddingService(inner, cache_dir=None)
+        service.embed("hola")
+
+        (cached,) = service._memory.values()
+        hit = service.embed("hola")
+
+        assert cached.dtype == np.float32
+        assert isinstance(hit, list) and hit == [4.0, 1.0]
+
+    def test_keys_are_namespaced_by_model(self):
+        small = CachedEmbeddingService(FakeEmbeddingService("small"), cache_dir=None)
+        large = CachedEmbeddingService(FakeEmbeddingService("large"), cache_dir=None)
+
+        assert small._key("texto") != large._key("texto")
+
+    def test_delegates_dimension(self, inner):
+        service = CachedEmbeddingService(inner, cache_dir=None)
+        assert service.dimension == 2
+        assert service.model_name == "fake"
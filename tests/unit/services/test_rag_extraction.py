@@ -2,6 +2,7 @@
 
 import pytest
 import sys
+import time
 from pathlib import Path
 
 # Add src to path for imports
@@ -42,6 +43,31 @@ class TestExtractTextFromBytes:
         # Result depends on bs4 availability
         assert "Texto HTML" in result or result == ""
 
+    def test_content_type_parameters_are_ignored(self):
+        """Should match the MIME type without charset parameters."""
+        content = b"<html><body><p>Texto HTML</p></body></html>"
+        result = extract_text_from_bytes(content, "Text/HTML; charset=utf-8", "page")
+        assert "<p>" not in result
+
+    def test_plain_content_type_falls_back_to_suffix(self):
+        """A generic text/plain type should not hide the filename suffix."""
+        content = b"<html><body><p>Texto HTML</p></body></html>"
+        result = extract_text_from_bytes(content, "text/plain", "page.HTM")
+        assert "<p>" not in result
+
+    def test_pdf_extraction(self, sample_documents_dir):
+        """Should extract text from PDF files."""
+        content = (sample_documents_dir / "test_rag_doc.pdf").read_bytes()
+        result = extract_text_from_bytes(content, "application/pdf", "test_rag_doc.pdf")
+        # Result depends on pypdfium2/pypdf availability
+        assert "ORNITORRINCO" in result or result == ""
+        assert "\r" not in result
+    
+    def test_invalid_pdf_returns_empty_string(self):
+        """Corrupt PDF data should not raise."""
+        result = extract_text_from_bytes(b"not a pdf", "application/pdf", "broken.pdf")
+        assert result == ""
+
 
 class TestCleanText:
     """Tests for _clean_text function."""
@@ -70,6 +96,30 @@ class TestCleanText:
         assert "\x01" not in result
         assert "\x02" not in result
     
+    def test_control_only_lines_are_dropped(self):
+        text = "Línea 1\n\x00\x0c\nLínea 2"
+        result = _clean_text(text)
+        assert result == "Línea 1\nLínea 2"
+    
+    def test_whitespace_controls_keep_words_apart(self):
+        text = "Col1\tCol2\rPágina 1\x0cPágina 2\r\n"
+        result = _clean_text(text)
+        assert result == "Col1 Col2\nPágina 1\nPágina 2"
+    
+    def test_long_whitespace_run_is_linear(self):
+        def best_time(n):
+            text = "a" + " " * n + "b\n" + "\t" * n
+            timings = []
+            for _ in range(3):
+                start = time.perf_counter()
+                result = _clean_text(text)
+                timings.append(time.perf_counter() - start)
+            assert result == "a" + " " * n + "b"
+            return min(timings)
+        
+        # 8x the input should take ~8x as long; a quadratic scan takes ~64x
+        assert best_time(200_000) < 24 * best_time(25_000)
+    
     def test_preserves_newlines(self):
         text = "Línea 1\nLínea 2"
         result = _clean_text(text)
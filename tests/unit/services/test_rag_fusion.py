@@ -0,0 +1,93 @@
+"""Unit tests for RAG reciprocal rank fusion."""
+
+import random
+import pytest
+import sys
+import uuid
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / "src"))
+
+from services.rag.core.search import reciprocal_rank_fusion
+
+
+def _reference_rrf(results_list, k=60):
+    """Straightforward dict-based RRF used as the expected behaviour."""
+    fused, best = {}, {}
+    for results in results_list:
+        for rank, doc in enumerate(results):
+            doc_id = doc.get("id", 0)
+            fused[doc_id] = fused.get(doc_id, 0) + 1 / (rank + k)
+            if doc_id not in best or (doc.get("score") or 0) > (best[doc_id].get("score") or 0):
+                best[doc_id] = doc
+    return [
+        {**best[doc_id], "rrf_score": score, "score": score}
+        for doc_id, score in sorted(fused.items(), key=lambda x: x[1], reverse=True)
+    ]
+
+
+class TestReciprocalRankFusion:
+    """Tests for reciprocal_rank_fusion function."""
+
+    def test_empty_input_returns_empty_list(self):
+        assert reciprocal_rank_fusion([]) == []
+        assert reciprocal_rank_fusion([[], []]) == []
+
+    def test_document_in_both_lists_ranks_first(self):
+        content = [{"id": 1, "score": 0.9}, {"id": 2, "score": 0.8}]
+        names = [{"id": 2, "score": 0.7}]
+
+        result = reciprocal_rank_fusion([content, names])
+
+        assert [r["id"] for r in result] == [2, 1]
+        assert result[0]["rrf_score"] == pytest.approx(1 / 61 + 1 / 60)
+        assert result[0]["score"] == result[0]["rrf_score"]
+
+    def test_keeps_best_scoring_version_of_duplicate(self):
+        content = [{"id": 1, "score": 0.5, "chunk": "low"}]
+        names = [{"id": 1, "score": 0.9, "chunk": "high"}]
+
+        result = reciprocal_rank_fusion([content, names])
+
+        assert len(result) == 1
+        assert result[0]["chunk"] == "high"
+
+    def test_does_not_mutate_input(self):
+        content = [{"id": 1, "score": 0.5}]
+        reciprocal_rank_fusion([content])
+        assert content == [{"id": 1, "score": 0.5}]
+
+    def test_matches_reference_implementation(self):
+        rng = random.Random(42)
+        results_list = [
+            [{"id": rng.randint(0, 30), "score": rng.random(), "pos": (n, i)} for i in range(25)]
+            for n in range(3)
+        ]
+
+        assert reciprocal_rank_fusion(results_list) == _reference_rrf(results_list)
+
+    def test_limit_returns_prefix_of_full_ranking(self):
+        rng = random.Random(7)
+        results_list = [
+            [{"id": rng.randint(0, 15), "score": rng.random()} for _ in range(20)]
+            for _ in range(2)
+        ]
+        full = reciprocal_rank_fusion(results_list)
+
+        for limit in (1, 3, 5, len(full), len(full) + 5):
+            assert reciprocal_rank_fusion(results_list, limit=limit) == full[:limit]
+
+    def test_non_integer_ids_and_missing_scores(self):
+        rng = random.Random(3)
+        ids = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(8)] + ["doc.pdf"]
+        results_list = [
+            [
+                {"id": rng.choice(ids), "score": rng.choice([None, rng.random()]), "pos": (n, i)}
+                for i in range(15)
+            ]
+            for n in range(3)
+        ]
+
+        assert reciprocal_rank_fusion(results_list) == _reference_rrf(results_list)
+        assert reciprocal_rank_fusion(results_list, limit=4) == _reference_rrf(results_list)[:4]
@@ -0,0 +1,86 @@
+"""Unit tests for RAG indexing module."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / "src"))
+
+from services.rag.core import indexing
+
+
+class FakeEmbeddingService:
+    """Embedding service stand-in returning one-dimensional vectors."""
+
+    async def aembed_batch(self, texts):
+        await asyncio.sleep(0)
+        return [[float(len(text))] for text in texts]
+
+
+class SlowQdrant:
+    """Async Qdrant client stand-in with slow upserts."""
+
+    def __init__(self, on_upsert):
+        self.on_upsert = on_upsert
+        self.payload_waits = []
+
+    async def upsert(self, collection_name, points, wait):
+        await asyncio.sleep(0.002)
+        self.on_upsert(len(points))
+
+    async def set_payload(self, wait, **kwargs):
+        self.payload_waits.append(wait)
+
+
+class TestIndexContentAsync:
+    """Tests for index_content_async."""
+
+    @pytest.fixture
+    def pipeline(self, monkeypatch):
+        """Patch out extraction and Qdrant; count chunks held in memory."""
+        state = {"held": 0, "peak": 0}
+
+        def fake_chunks(text):
+            for i in range(200):
+                state["held"] += 1
+                state["peak"] = max(state["peak"], state["held"])
+                yield {"text": f"fragmento {i}", "chunk_index": i, "type": "text"}
+
+        def on_upsert(count):
+            state["held"] -= count
+
+        async def fake_extract(data, content_type, filename):
+            return "texto suficientemente largo"
+
+        qdrant = state["qdrant"] = SlowQdrant(on_upsert)
+        monkeypatch.setattr(indexing, "get_service", lambda: FakeEmbeddingService())
+        monkeypatch.setattr(indexing, "_extract_text", fake_extract)
+        monkeypatch.setattr(indexing, "ensure_collection", lambda client, name: None)
+        monkeypatch.setattr(indexing, "get_client", lambda: None)
+        monkeypatch.setattr(indexing, "get_async_client", lambda: qdrant)
+        monkeypatch.setattr(indexing, "iter_chunks", fake_chunks)
+        monkeypatch.setattr(indexing, "EMBED_BATCH_SIZE", 4)
+        monkeypatch.setattr(indexing, "INDEX_CONCURRENCY", 2)
+        monkeypatch.setattr(indexing, "QDRANT_UPSERT_BATCH_SIZE", 2)
+        monkeypatch.setattr(indexing, "QDRANT_UPSERT_CONCURRENCY", 1)
+        return state
+
+    def test_windows_in_memory_are_bounded(self, pipeline):
+        result = asyncio.run(
+            indexing.index_content_async({"id": 1, "filename": "doc.txt"}, b"", "text/plain")
+        )
+
+        assert result["success"] is True
+        assert result["chunks_indexed"] == 200
+        assert pipeline["held"] == 0
+        assert pipeline["peak"] <= 2 * 4
+
+    def test_final_payload_update_waits(self, pipeline):
+        asyncio.run(
+            indexing.index_content_async({"id": 1, "filename": "doc.txt"}, b"", "text/plain")
+        )
+
+        assert pipeline["qdrant"].payload_waits == [True]
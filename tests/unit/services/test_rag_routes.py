@@ -0,0 +1,92 @@
+"""Unit tests for RAG search routes."""
+
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / "src"))
+
+from services.rag.app import create_app
+from services.rag.routes import search as search_routes
+
+
+def _result(query):
+    return {"id": len(query), "filename": f"{query}.pdf", "score": 0.5}
+
+
+def _comparison(query):
+    return {
+        "order_changed": True,
+        "top_filename": f"{query}.pdf",
+        "top_filename_rerank": "otro.pdf",
+        "num_results": 1,
+        "num_results_rerank": 1,
+        "embed_ms": 1.0,
+        "retrieval_ms": 2.0,
+        "rerank_ms": 3.0,
+    }
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Client for the app (without its lifespan) with the search core faked."""
+    async def hybrid_search_async(query, limit, rerank):
+        return [_result(query)]
+
+    async def hybrid_search_batch_async(queries, limit, rerank):
+        return [[_result(query)] for query in queries]
+
+    async def compare_rerank_async(query, limit):
+        return _comparison(query)
+
+    async def compare_rerank_batch_async(queries, limit):
+        return [_comparison(query) for query in queries]
+
+    monkeypatch.setattr(search_routes, "hybrid_search_async", hybrid_search_async)
+    monkeypatch.setattr(search_routes, "hybrid_search_batch_async", hybrid_search_batch_async)
+    monkeypatch.setattr(search_routes, "compare_rerank_async", compare_rerank_async)
+    monkeypatch.setattr(search_routes, "compare_rerank_batch_async", compare_rerank_batch_async)
+    return TestClient(create_app())
+
+
+class TestSearchRoutes:
+    """Tests for the search endpoints."""
+
+    def test_search(self, client):
+        response = client.post("/search", json={"text": "uno"})
+
+        assert response.status_code == 200
+        assert response.json()["results"][0]["filename"] == "uno.pdf"
+
+    def test_search_batch(self, client):
+        response = client.post("/search/batch", json={"queries": ["uno", "dos"]})
+
+        assert response.status_code == 200
+        responses = response.json()["responses"]
+        assert [r["query"] for r in responses] == ["uno", "dos"]
+        assert responses[1]["results"][0]["filename"] == "dos.pdf"
+
+    def test_search_batch_rejects_empty_queries(self, client):
+        response = client.post("/search/batch", json={"queries": []})
+
+        assert response.status_code == 422
+
+    def test_compare_rerank(self, client):
+        response = client.post("/search/compare_rerank", json={"text": "uno"})
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["query"] == "uno"
+        assert body["order_changed"] is True
+        assert body["rerank_ms"] == 3.0
+
+    def test_compare_rerank_batch(self, client):
+        response = client.post("/search/compare_rerank/batch", json={"queries": ["uno", "dos"]})
+
+        assert response.status_code == 200
+        responses = response.json()["responses"]
+        assert [r["query"] for r in responses] == ["uno", "dos"]
+        assert responses[0]["top_filename"] == "uno.pdf"
@@ -0,0 +1,157 @@
+"""Unit tests for RAG search pipeline."""
+
+import asyncio
+import pytest
+import sys
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / "src"))
+
+from services.rag.core import search
+
+
+class FakeReranker:
+    """Cross-encoder stand-in that scores a chunk by its length."""
+
+    def predict(self, pairs, **kwargs):
+        return [float(len(text)) for _, text in pairs]
+
+
+@pytest.fixture
+def fake_reranker(monkeypatch):
+    monkeypatch.setattr(search, "_get_reranker", lambda: FakeReranker())
+    monkeypatch.setattr(search, "USE_FP16", False)
+
+
+class TestCompareRerank:
+    """Tests for the single-retrieval rerank comparison."""
+
+    def test_reports_changed_top_result(self, fake_reranker):
+        content = [
+            {"id": 1, "score": 0.9, "filename": "a.pdf", "chunk": "corto"},
+            {"id": 2, "score": 0.8, "filename": "b.pdf", "chunk": "un fragmento mucho mas largo"},
+        ]
+
+        result = search._compare_rerank("consulta", content, [], limit=2)
+
+        assert result["top_filename"] == "a.pdf"
+        assert result["top_filename_rerank"] == "b.pdf"
+        assert result["order_changed"] is True
+        assert result["rerank_score"] == float(len(content[1]["chunk"]))
+        assert result["num_results"] == result["num_results_rerank"] == 2
+
+    def test_reranks_every_fused_candidate(self, fake_reranker):
+        content = [
+            {"id": 1, "score": 0.9, "filename": "a.pdf", "chunk": "a"},
+            {"id": 2, "score": 0.8, "filename": "b.pdf", "chunk": "bb"},
+            {"id": 3, "score": 0.7, "filename": "c.pdf", "chunk": "el fragmento mas largo"},
+        ]
+
+        result = search._compare_rerank("consulta", content, [], limit=1)
+        results = search._fuse_and_rerank("consulta", [dict(r) for r in content], [], limit=1, rerank=True)
+
+        assert result["top_filename_rerank"] == "c.pdf"
+        assert [r["filename"] for r in results] == ["c.pdf"]
+
+    def test_batch_reports_per_query_timings(self, fake_reranker, monkeypatch):
+        async def fake_search(vector, collection, limit):
+            return [{"id": int(vector[0]), "score": 1.0, "filename": "a.pdf", "chunk": "x"}]
+
+        monkeypatch.setattr(search, "get_service", lambda: RecordingEmbeddingService())
+        monkeypatch.setattr(search, "_avector_search_with_vec", fake_search)
+
+        results = asyncio.run(search.compare_rerank_batch_async(["uno", "dos"], limit=5))
+
+        for result in results:
+            assert result["embed_ms"] >= 0
+            assert result["retrieval_ms"] >= 0
+            assert result["rerank_ms"] >= 0
+
+    def test_batch_degrades_when_embedding_fails(self, fake_reranker, monkeypatch):
+        monkeypatch.setattr(search, "get_service", lambda: FailingEmbeddingService())
+
+        results = asyncio.run(search.compare_rerank_batch_async(["uno", "dos"], limit=5))
+
+        assert [r["num_results"] for r in results] == [0, 0]
+        assert all(r["order_changed"] is False for r in results)
+
+    def test_empty_candidates(self, fake_reranker):
+        result = search._compare_rerank("consulta", [], [], limit=5)
+
+        assert result["order_changed"] is False
+        assert result["top_filename"] is None
+        assert result["num_results"] == 0
+
+
+class TestGetReranker:
+    """Tests for the lazy reranker load."""
+
+    def test_concurrent_callers_load_model_once(self, monkeypatch):
+        loads = []
+
+        class SlowCrossEncoder:
+            def __init__(self, *args, **kwargs):
+                loads.append(self)
+                time.sleep(0.05)
+
+        fake_torch = types.SimpleNamespace(cuda=types.SimpleNamespace(is_available=lambda: False))
+        monkeypatch.setitem(sys.modules, "torch", fake_torch)
+        monkeypatch.setitem(
+            sys.modules, "sentence_transformers", types.SimpleNamespace(CrossEncoder=SlowCrossEncoder)
+        )
+        monkeypatch.setattr(search, "_reranker", None)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            rerankers = list(executor.map(lambda _: search._get_reranker(), range(8)))
+
+        assert len(loads) == 1
+        assert all(reranker is loads[0] for reranker in rerankers)
+
+
+class RecordingEmbeddingService:
+    """Embedding service stand-in that records each batch call."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def aembed_batch(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+
+class FailingEmbeddingService:
+    """Embedding service stand-in whose backend is down."""
+
+    async def aembed_batch(self, texts):
+        raise RuntimeError("embedding backend down")
+
+
+class TestSearchBatch:
+    """Tests for batched hybrid search."""
+
+    def test_embeds_all_queries_in_one_call(self, monkeypatch):
+        service = RecordingEmbeddingService()
+
+        async def fake_search(vector, collection, limit):
+            return [{"id": int(vector[0]), "score": 1.0, "filename": f"{collection}.pdf"}]
+
+        monkeypatch.setattr(search, "get_service", lambda: service)
+        monkeypatch.setattr(search, "_avector_search_with_vec", fake_search)
+
+        results = asyncio.run(
+            search.hybrid_search_batch_async(["uno", "cuatro"], limit=5, rerank=False)
+        )
+
+        assert service.calls == [["uno", "cuatro"]]
+        assert [[r["id"] for r in query_results] for query_results in results] == [[3], [6]]
+
+    def test_degrades_when_embedding_fails(self, monkeypatch):
+        monkeypatch.setattr(search, "get_service", lambda: FailingEmbeddingService())
+
+        results = asyncio.run(search.hybrid_search_batch_async(["uno", "dos"], limit=5))
+
+        assert results == [[], []]
@@ -0,0 +1,265 @@
+"""Unit tests for RAG upload bookkeeping."""
+
+import asyncio
+import csv
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / "src"))
+
+from services.rag.core import uploads
+
+
+class FakeCursor:
+    """
+    Cursor over an in-memory uploads table.
+
+    Like Postgres with ON CONFLICT DO NOTHING, rows whose content_sha is
+    already stored (or repeated earlier in the same statement) are skipped.
+    RETURNING rows come back in reverse insertion order, so callers can't
+    rely on it.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.staging = []
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        if sql.startswith("EXECUTE ins_upload"):
+            self.rows = self.insert_uploads([params])
+        elif sql.startswith("EXECUTE ins_index_job"):
+            self.rows = self.insert_jobs([params[0]])
+        elif "FROM uploads_staging" in sql:
+            self.rows = self.insert_uploads(self.staging)
+        elif "content_sha = ANY" in sql:
+            self.rows = [
+                (memoryview(sha), *upload, self.db.job_status(upload[0]))
+                for sha in params[0] if sha in self.db.uploads
+                for upload in [self.db.uploads[sha]]
+            ]
+        elif "CREATE TEMP TABLE" not in sql:
+            raise AssertionError(f"Unexpected SQL: {sql}")
+
+    def copy_expert(self, sql, buf):
+        self.staging = [
+            (filename, path, int(size), content_type or None, bytes.fromhex(sha[2:]))
+            for filename, path, size, content_type, sha in csv.reader(buf)
+        ]
+
+    def fetchall(self):
+        return self.rows
+
+    def insert_uploads(self, rows):
+        inserted = []
+        for filename, path, size_bytes, content_type, content_sha in rows:
+            if content_sha in self.db.uploads:
+                continue
+            upload_id = len(self.db.uploads) + 1
+            created_at = f"t{upload_id}"
+            self.db.uploads[content_sha] = (
+                upload_id, filename, path, size_bytes, content_type, created_at
+            )
+            inserted.append((upload_id, path, created_at))
+        return inserted[::-1]
+
+    def insert_jobs(self, upload_ids):
+        jobs = []
+        for upload_id in upload_ids:
+            self.db.jobs.append(upload_id)
+            self.db.failed.discard(upload_id)
+            jobs.append((upload_id, 100 + len(self.db.jobs)))
+        return jobs[::-1]
+
+
+class FakeDatabase:
+    """Uploads by content_sha, the upload ids of queued jobs, and failed uploads."""
+
+    def __init__(self):
+        self.uploads = {}
+        self.jobs = []
+        self.failed = set()
+
+    def job_status(self, upload_id):
+        """Status of the latest job for an upload."""
+        if upload_id in self.failed:
+            return "failed"
+        return "queued" if upload_id in self.jobs else None
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+def fake_execute_values(cur, sql, argslist, page_size=None, fetch=False):
+    if "INSERT INTO uploads" in sql:
+        return cur.insert_uploads(argslist)
+    return cur.insert_jobs([upload_id for upload_id, in argslist])
+
+
+@pytest.fixture
+def db(monkeypatch):
+    database = FakeDatabase()
+
+    @contextmanager
+    def get_connection():
+        yield database
+
+    monkeypatch.setattr(uploads, "get_connection", get_connection)
+    monkeypatch.setattr(uploads, "execute_values", fake_execute_values)
+    return database
+
+
+def _row(n, sha=None):
+    return (f"doc{n}.pdf", f"/data/{n}.pdf", 10 * n, "application/pdf", sha or bytes([n]))
+
+
+class TestInsertUploads:
+    """Tests for _insert_uploads and record_uploads_bulk."""
+
+    @pytest.fixture(params=["values", "copy"])
+    def insert(self, request):
+        if request.param == "values":
+            return uploads._insert_uploads
+        return uploads.record_uploads_bulk
+
+    def test_single_row_uses_prepared_statements(self, db):
+        (result,) = uploads._insert_uploads([_row(1)])
+
+        assert result == {"id": 1, "created_at": "t1", "job_id": 101, "duplicate": False}
+        assert db.jobs == [1]
+
+    def test_results_follow_row_order(self, db, insert):
+        results = insert([_row(1), _row(2), _row(3)])
+
+        job_ids = {upload_id: 101 + i for i, upload_id in enumerate(db.jobs)}
+        assert [r["id"] for r in results] == [1, 2, 3]
+        assert [r["job_id"] for r in results] == [job_ids[1], job_ids[2], job_ids[3]]
+        assert all(r["duplicate"] is False for r in results)
+
+    def test_duplicate_of_stored_upload(self, db, insert):
+        insert([_row(1)])
+
+        results = insert([_row(2), _row(3, sha=bytes([1]))])
+
+        assert results[0]["duplicate"] is False
+        assert results[1] == {
+            "id": 1,
+            "filename": "doc1.pdf",
+            "stored_path": "/data/1.pdf",
+            "size_bytes": 10,
+            "content_type": "application/pdf",
+            "created_at": "t1",
+            "job_status": "queued",
+            "job_id": None,
+            "duplicate": True,
+        }
+        assert db.jobs == [1, 2]
+
+    def test_duplicate_of_failed_upload_is_requeued(self, db, insert):
+        insert([_row(1)])
+        db.failed.add(1)
+
+        results = insert([_row(2, sha=bytes([1])), _row(3, sha=bytes([1]))])
+
+        assert [r["duplicate"] for r in results] == [True, True]
+        assert results[0]["job_id"] == 102
+        assert results[1]["job_id"] is None
+        assert db.jobs == [1, 1]
+        assert db.job_status(1) == "queued"
+
+    def test_duplicate_within_batch(self, db, insert):
+        results = insert([_row(1), _row(2, sha=bytes([1]))])
+
+        assert results[0]["duplicate"] is False
+        assert results[1]["duplicate"] is True
+        assert results[1]["id"] == results[0]["id"]
+        assert db.jobs == [results[0]["id"]]
+
+    def test_all_duplicates_insert_no_jobs(self, db, insert):
+        insert([_row(1)])
+        db.jobs.clear()
+
+        results = insert([_row(2, sha=bytes([1]))])
+
+        assert results[0]["duplicate"] is True
+        assert db.jobs == []
+
+
+class TestCoalescer:
+    """Tests for the record_upload coalescer."""
+
+    def test_concurrent_uploads_share_one_insert(self, monkeypatch):
+        batches = []
+
+        def fake_insert(rows):
+            batches.append(rows)
+            return [{"id": row[2]} for row in rows]
+
+        monkeypatch.setattr(uploads, "_insert_uploads", fake_insert)
+
+        async def run():
+            await uploads.start_coalescer()
+            try:
+                return await asyncio.gather(*(uploads.record_upload(*_row(n)) for n in (1, 2, 3)))
+            finally:
+                await uploads.stop_coalescer()
+
+        results = asyncio.run(run())
+
+        assert [r["id"] for r in results] == [10, 20, 30]
+        assert len(batches) == 1
+
+    def test_batches_are_capped(self, monkeypatch):
+        batches = []
+
+        def fake_insert(rows):
+            batches.append(len(rows))
+            return [{"id": row[2]} for row in rows]
+
+        monkeypatch.setattr(uploads, "_insert_uploads", fake_insert)
+        monkeypatch.setattr(uploads, "UPLOAD_BATCH_MAX", 2)
+
+        async def run():
+            await uploads.start_coalescer()
+            try:
+                return await asyncio.gather(*(uploads.record_upload(*_row(n)) for n in range(1, 6)))
+            finally:
+                await uploads.stop_coalescer()
+
+        results = asyncio.run(run())
+
+        assert [r["id"] for r in results] == [10, 20, 30, 40, 50]
+        assert batches == [2, 2, 1]
+
+    def test_insert_failure_reaches_every_caller(self, monkeypatch):
+        def failing_insert(rows):
+            raise RuntimeError("db down")
+
+        monkeypatch.setattr(uploads, "_insert_uploads", failing_insert)
+
+        async def run():
+            await uploads.start_coalescer()
+            try:
+                return await asyncio.gather(
+                    *(uploads.record_upload(*_row(n)) for n in (1, 2)), return_exceptions=True
+                )
+            finally:
+                await uploads.stop_coalescer()
+
+        results = asyncio.run(run())
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    def test_record_upload_requires_running_coalescer(self):
+        with pytest.raises(RuntimeError):
+            asyncio.run(uploads.record_upload(*_row(1)))
@@ -0,0 +1,68 @@
+"""Unit tests for RAG vector store clients."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / "src"))
+
+from services.rag.core import embeddings, vector_store
+
+
+class FakeAsyncClient:
+    """Async client stand-in that records whether it was closed."""
+
+    instances = []
+
+    def __init__(self, **kwargs):
+        self.closed = False
+        FakeAsyncClient.instances.append(self)
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeEmbeddingService:
+    """Embedding service stand-in counting aclose calls."""
+
+    def __init__(self):
+        self.aclose_calls = 0
+
+    async def aclose(self):
+        self.aclose_calls += 1
+
+
+class TestRunSync:
+    """Tests for run_sync."""
+
+    @pytest.fixture(autouse=True)
+    def fake_clients(self, monkeypatch):
+        FakeAsyncClient.instances = []
+        monkeypatch.setattr(vector_store, "AsyncQdrantClient", FakeAsyncClient)
+
+    def test_closes_clients_opened_on_its_loop(self, monkeypatch):
+        service = FakeEmbeddingService()
+        monkeypatch.setattr(embeddings, "_embedding_service", service)
+
+        async def use_client():
+            return vector_store.get_async_client() is vector_store.get_async_client()
+
+        assert vector_store.run_sync(use_client()) is True
+        assert vector_store.run_sync(use_client()) is True
+
+        assert len(FakeAsyncClient.instances) == 2
+        assert all(client.closed for client in FakeAsyncClient.instances)
+        assert service.aclose_calls == 2
+        assert len(vector_store._async_clients) == 0
+
+    def test_closes_clients_when_coroutine_fails(self):
+        async def fail():
+            vector_store.get_async_client()
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            vector_store.run_sync(fail())
+
+        assert FakeAsyncClient.instances[0].closed
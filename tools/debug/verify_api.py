@@ -3,10 +3,13 @@ import sys
 
 BASE_URL = "http://localhost:8088"
 
+# Shared session: all checks reuse one keep-alive connection
+SESSION = requests.Session()
+
 def test_health():
     print("Testing Health...")
     try:
-        resp = requests.get(f"{BASE_URL}/health")
+        resp = SESSION.get(f"{BASE_URL}/health")
         resp.raise_for_status()
         print(f"Health OK: {resp.json()}")
     except Exception as e:
@@ -15,7 +18,7 @@ def test_health():
 def test_chat():
     print("\nTesting Chat...")
     try:
-        resp = requests.post(f"{BASE_URL}/api/chat", json={"message": "Hola, test de verificacion"})
+        resp = SESSION.post(f"{BASE_URL}/api/chat", json={"message": "Hola, test de verificacion"})
         resp.raise_for_status()
         print(f"Chat OK: {resp.json()}")
     except Exception as e:
@@ -24,8 +27,9 @@ def test_chat():
 def test_upload():
     print("\nTesting Upload...")
     try:
-        files = {'file': ('test_rag.txt', open('test_rag.txt', 'rb'), 'text/plain')}
-        resp = requests.post(f"{BASE_URL}/api/upload", files=files)
+        with open('test_rag.txt', 'rb') as f:
+            files = {'file': ('test_rag.txt', f, 'text/plain')}
+            resp = SESSION.post(f"{BASE_URL}/api/upload", files=files)
         resp.raise_for_status()
         data = resp.json()
         print(f"Upload OK: {data}")
@@ -37,7 +41,7 @@ def test_upload():
 def test_search():
     print("\nTesting Search...")
     try:
-        resp = requests.post(f"{BASE_URL}/api/search", json={"text": "verificacion del sistema"})
+        resp = SESSION.post(f"{BASE_URL}/api/search", json={"text": "verificacion del sistema"})
         resp.raise_for_status()
         print(f"Search OK: {resp.json()}")
     except Exception as e:
@@ -3,18 +3,227 @@ RAG Validation Script - Tests RAG improvements with synthetic PDFs.
 Compares performance with and without reranking.
 """
 
+import argparse
+import asyncio
+import httpx
 import json
-import requests
+import numpy as np
+import queue
+import sys
+import threading
 import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 from datetime import datetime
+from pydantic import TypeAdapter, ValidationError
+
+try:
+    import orjson
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    _loads = json.loads
+    
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+# Concurrent upload requests (same as a browser's per-host connection limit)
+UPLOAD_WORKERS = 6
+
+# Endpoint ranking one retrieval with and without reranking
+COMPARE_RERANK_ENDPOINT = "/search/compare_rerank"
+
+# Maximum time to wait for uploads to be indexed, in seconds
+INDEX_WAIT_TIMEOUT = 60
+
+# Files packed into one /upload/bulk request
+BULK_UPLOAD_MAX_FILES = 8
+BULK_UPLOAD_MAX_BYTES = 20 * 1024 * 1024
+
+# Seconds a PDF directory listing is reused while the directory is unchanged
+PDF_LISTING_TTL = 60
+
+# Test queries sent per request to a batch endpoint (embedded together)
+QUERY_BATCH_SIZE = 16
+
+# Quick mode: queries sampled per category before deciding whether its
+# reranking verdict has converged, and how far from 50/50 the share of changed
+# top results must be (> 0.4 means at least 90% agree)
+CONVERGENCE_SAMPLES = 5
+CONVERGENCE_MARGIN = 0.4
+
+# Batch requests in flight at once. All batches are dispatched together; this
+# only keeps a large suite from flooding the server
+MAX_CONCURRENT_REQUESTS = 4
+
+
+@dataclass(slots=True, frozen=True)
+class TestQuery:
+    """A query from the test queries file."""
+    
+    query: str
+    category: Optional[str] = None
+    expected_doc: Optional[str] = None
+    expected_answer: Optional[str] = None
+
+
+@dataclass(slots=True)
+class Timing:
+    """Elapsed time of a timed() block, set when the block exits."""
+    
+    elapsed_ms: float = 0.0
+
+
+@contextmanager
+def timed() -> Iterator[Timing]:
+    """Measure the wall time of the block with the monotonic nanosecond clock."""
+    timing = Timing()
+    start = time.perf_counter_ns()
+    try:
+        yield timing
+    finally:
+        timing.elapsed_ms = (time.perf_counter_ns() - start) / 1e6
+
+
+# Validates the "test_queries" list of the queries file
+_TEST_QUERIES = TypeAdapter(List[TestQuery])
+
+
+class QueryResults:
+    """
+    Per-query results stored column-wise: one preallocated NumPy array per
+    numeric field, plain lists for the strings. Rows are written by query index.
+    Rows whose request failed are marked in `error` and hold no measurements.
+    """
+    
+    def __init__(self, capacity: int = 0):
+        self.filled = np.zeros(capacity, dtype=bool)
+        self.error = np.zeros(capacity, dtype=bool)
+        self.elapsed_no_rerank = np.full(capacity, np.nan)
+        self.elapsed_with_rerank = np.full(capacity, np.nan)
+        self.rerank_score = np.full(capacity, np.nan)
+        self.original_score = np.full(capacity, np.nan)
+        self.order_changed = np.zeros(capacity, dtype=bool)
+        self.query: List[str] = [None] * capacity
+        self.category: List[str] = [None] * capacity
+    
+    def __len__(self) -> int:
+        return int(self.filled.sum())
+    
+    @property
+    def capacity(self) -> int:
+        return len(self.filled)
+    
+    def reserve(self, capacity: int):
+        """Grow the columns to hold at least `capacity` rows."""
+        extra = capacity - self.capacity
+        if extra <= 0:
+            return
+        self.filled = np.concatenate([self.filled, np.zeros(extra, dtype=bool)])
+        self.error = np.concatenate([self.error, np.zeros(extra, dtype=bool)])
+        for name in ("elapsed_no_rerank", "elapsed_with_rerank", "rerank_score", "original_score"):
+            setattr(self, name, np.concatenate([getattr(self, name), np.full(extra, np.nan)]))
+        self.order_changed = np.concatenate([self.order_changed, np.zeros(extra, dtype=bool)])
+        self.query.extend([None] * extra)
+        self.category.extend([None] * extra)
+    
+    def record(self, i: int, comparison: Dict[str, Any]):
+        """Store the comparison of query `i`."""
+        self.filled[i] = True
+        self.query[i] = comparison["query"]
+        self.category[i] = comparison.get("category") or "unknown"
+        if "error" in comparison:
+            self.error[i] = True
+            return
+        self.elapsed_no_rerank[i] = comparison["without_rerank"]["elapsed_ms"]
+        self.elapsed_with_rerank[i] = comparison["with_rerank"]["elapsed_ms"]
+        self.order_changed[i] = bool(comparison.get("order_changed"))
+        if comparison.get("rerank_score") is not None and comparison.get("original_score") is not None:
+            self.rerank_score[i] = comparison["rerank_score"]
+            self.original_score[i] = comparison["original_score"]
+
+
+class ProgressEvents:
+    """
+    Writes progress events to stdout as NDJSON from a background thread.
+    
+    Emitting only serializes the event and queues it, so the event loop
+    (and the latency of requests still in flight) never waits on the terminal.
+    """
+    
+    def __init__(self, stream=None):
+        self._stream = stream or sys.stdout.buffer
+        self._queue = queue.SimpleQueue()
+        threading.Thread(target=self._run, daemon=True).start()
+    
+    def emit(self, event: Dict[str, Any]):
+        """Queue one event for writing."""
+        self._queue.put(_dumps(event) + b"\n")
+    
+    def flush(self):
+        """Block until every queued event has been written."""
+        # Text printed before the events must reach the stream first
+        sys.stdout.flush()
+        written = threading.Event()
+        self._queue.put(written)
+        written.wait()
+    
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if isinstance(item, threading.Event):
+                self._stream.flush()
+                item.set()
+                continue
+            self._stream.write(item)
+            if self._queue.empty():
+                self._stream.flush()
 
 
 class RAGTester:
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        max_concurrent_requests: int = MAX_CONCURRENT_REQUESTS,
+    ):
         self.base_url = base_url
-        self.results = []
+        self.max_concurrent_requests = max_concurrent_requests
+        self.results = QueryResults()
+        
+        # Remaining queries skipped per converged category (quick mode)
+        self.skipped: Dict[str, int] = {}
+        
+        # Latency of each upload request, in ms
+        self.upload_latency_ms: List[float] = []
+        
+        # Latency of each search request sent (single or batch), in ms
+        self.request_latency_ms: List[float] = []
+        
+        # Keep-alive connections shared by all uploads; failed connects are
+        # retried. Unlike requests, httpx streams file bodies in chunks
+        self.session = httpx.Client(
+            transport=httpx.HTTPTransport(
+                retries=3,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+            ),
+            timeout=None,
+        )
+        
+        # Async client for the search queries (opened by run_all_tests)
+        self.client: httpx.AsyncClient = None
+        
+        # Search responses by (endpoint, normalized query, rerank)
+        self._query_cache: Dict[tuple, asyncio.Future] = {}
+        
+        # Timestamp naming the result files of the current run
+        self.run_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        # Per-upload and per-query progress (one NDJSON line each)
+        self.progress = ProgressEvents()
         
     def upload_test_pdfs(self, pdf_dir: str = "./test_pdfs") -> List[Dict]:
         """Upload all test PDFs to RAG server."""
@@ -24,121 +233,405 @@ class RAGTester:
             return []
         
         uploaded = []
-        pdfs = list(pdf_path.glob("*.pdf"))
+        pdfs = _list_pdfs(str(pdf_path))
+        batches = _batch_by_size(pdfs)
         
-        print(f"\n📤 Uploading {len(pdfs)} test PDFs...")
-        for pdf_file in pdfs:
-            try:
-                with open(pdf_file, 'rb') as f:
-                    files = {'file': (pdf_file.name, f, 'application/pdf')}
-                    response = requests.post(f"{self.base_url}/upload", files=files)
-                    
-                if response.status_code == 200:
-                    data = response.json()
+        print(f"\n📤 Uploading {len(pdfs)} test PDFs in {len(batches)} requests...")
+        sys.stdout.flush()
+        with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+            futures = {executor.submit(self._upload_batch, batch): batch for batch in batches}
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    results = future.result()
+                except httpx.HTTPStatusError as e:
+                    for name, _, _ in batch:
+                        self.progress.emit(
+                            {"event": "upload", "filename": name, "error": f"HTTP {e.response.status_code}"}
+                        )
+                    continue
+                except Exception as e:
+                    for name, _, _ in batch:
+                        self.progress.emit({"event": "upload", "filename": name, "error": str(e)})
+                    continue
+                
+                self.upload_latency_ms.append(results[0]['elapsed_ms'])
+                for data in results:
                     uploaded.append(data)
-                    print(f"  ✓ {pdf_file.name} - ID: {data['id']}")
-                else:
-                    print(f"  ✗ {pdf_file.name} - Error: {response.status_code}")
-            except Exception as e:
-                print(f"  ✗ {pdf_file.name} - Exception: {e}")
+                    self.progress.emit({
+                        "event": "upload",
+                        "filename": data['filename'],
+                        "id": data['id'],
+                        "elapsed_ms": round(data['elapsed_ms'], 1),
+                    })
+        self.progress.flush()
         
         # Wait for indexing to complete
-        print("\n⏳ Waiting 10 seconds for indexing to complete...")
-        time.sleep(10)
+        print("\n⏳ Waiting for indexing to complete...")
+        self.wait_for_indexing([data['id'] for data in uploaded])
         
         return uploaded
     
-    def run_query(self, query: str, rerank: bool = True, endpoint: str = "/search") -> Dict:
-        """Execute a search query."""
+    def wait_for_indexing(self, upload_ids: List[int], timeout: float = INDEX_WAIT_TIMEOUT) -> bool:
+        """
+        Poll the indexing status of uploads until none is queued or running.
+        
+        Polls start at 100 ms apart and back off to 1 s.
+        
+        Returns:
+            True if every upload settled (done, failed or without a job) before the timeout.
+        """
+        pending = set(upload_ids)
+        deadline = time.monotonic() + timeout
+        interval = 0.1
+        while pending:
+            for upload_id in list(pending):
+                response = self.session.get(f"{self.base_url}/uploads/{upload_id}/index_status")
+                if response.status_code == 404 or (
+                    response.is_success and response.json()["status"] not in ("queued", "running")
+                ):
+                    pending.discard(upload_id)
+            if not pending:
+                break
+            if time.monotonic() + interval > deadline:
+                print(f"  ⚠️  {len(pending)} uploads still indexing after {timeout:.0f}s")
+                return False
+            time.sleep(interval)
+            interval = min(interval * 1.5, 1.0)
+        return True
+    
+    def _upload_batch(self, pdfs: List[Tuple[str, str, int]]) -> List[Dict]:
+        """
+        Upload PDFs in one request: /upload for a single file, /upload/bulk otherwise.
+        
+        The files are streamed from disk as the body is sent, so a batch never
+        has to fit in memory. Each result gets the request time as elapsed_ms.
+        """
+        with ExitStack() as stack:
+            files = [
+                (name, stack.enter_context(open(path, 'rb')), 'application/pdf')
+                for name, path, _ in pdfs
+            ]
+            with timed() as timing:
+                if len(files) == 1:
+                    response = self.session.post(f"{self.base_url}/upload", files={'file': files[0]})
+                else:
+                    response = self.session.post(
+                        f"{self.base_url}/upload/bulk", files=[('files', f) for f in files]
+                    )
+        response.raise_for_status()
+        data = response.json()
+        results = [data] if len(files) == 1 else data
+        for result in results:
+            result['elapsed_ms'] = timing.elapsed_ms
+        return results
+    
+    async def run_query(self, query: str, rerank: bool = True, endpoint: str = "/search") -> Dict:
+        """
+        Execute a search query.
+        
+        Queries that only differ in whitespace are sent once; repeats (also
+        while the first request is still in flight) share its response and
+        are marked with cached=True. Failed requests (exceptions and error
+        responses) are not cached, so a later repeat is sent again.
+        """
+        key = (endpoint, _normalize_query(query), rerank)
+        request = self._query_cache.get(key)
+        if request is None:
+            request = asyncio.ensure_future(self._post_search(query, rerank, endpoint))
+            self._query_cache[key] = request
+            try:
+                data = await request
+            except Exception:
+                # Don't cache failures
+                del self._query_cache[key]
+                raise
+            if "error" in data:
+                del self._query_cache[key]
+            return data
+        
+        data = dict(await request)
+        data['cached'] = True
+        return data
+    
+    async def _post_search(self, query: str, rerank: bool, endpoint: str) -> Dict:
+        """Send a search request to the server."""
         url = f"{self.base_url}{endpoint}"
         payload = {"text": query, "limit": 10, "rerank": rerank}
         
-        start_time = time.time()
-        response = requests.post(url, json=payload)
-        elapsed = (time.time() - start_time) * 1000  # Convert to ms
+        with timed() as timing:
+            response = await self.client.post(url, json=payload)
+        elapsed = timing.elapsed_ms
+        self.request_latency_ms.append(elapsed)
         
         if response.status_code == 200:
-            data = response.json()
+            data = _loads(response.content)
             data['elapsed_ms'] = elapsed
             return data
         else:
             return {"error": f"HTTP {response.status_code}", "elapsed_ms": elapsed}
     
-    def test_single_query(self, query_data: Dict) -> Dict[str, Any]:
-        """Test a single query with and without reranking."""
-        query = query_data["query"]
-        print(f"\n🔍 Testing: {query}")
+    async def run_queries_batch(
+        self,
+        queries: List[str],
+        rerank: bool = True,
+        endpoint: str = "/search",
+    ) -> List[Dict]:
+        """
+        Execute several queries with one request to `endpoint`/batch.
+        
+        Shares the run_query cache: queries already sent (or in flight) and
+        repeats within the batch are not sent again. Like in run_query,
+        failures are not cached.
+        
+        Returns:
+            One response per query, as returned by run_query. elapsed_ms is
+            the time of the whole batch request.
+        """
+        keys = [(endpoint, _normalize_query(query), rerank) for query in queries]
+        
+        # Register the new queries before awaiting, so concurrent callers reuse them
+        loop = asyncio.get_running_loop()
+        to_send = {}
+        for query, key in zip(queries, keys):
+            if key not in self._query_cache:
+                to_send[key] = query
+                self._query_cache[key] = loop.create_future()
+        pending = [self._query_cache[key] for key in keys]
+        
+        if to_send:
+            try:
+                responses = await self._post_search_batch(list(to_send.values()), rerank, endpoint)
+            except Exception as e:
+                # Don't cache failures
+                for key in to_send:
+                    request = self._query_cache.pop(key)
+                    request.set_exception(e)
+                    request.exception()  # Mark as retrieved
+                raise
+            for key, data in zip(to_send, responses):
+                self._query_cache[key].set_result(data)
+                if "error" in data:
+                    # Don't cache failures (requests already waiting still get them)
+                    del self._query_cache[key]
+        
+        results = []
+        for key, request in zip(keys, pending):
+            data = await request
+            if to_send.pop(key, None) is None:
+                data = dict(data)
+                data['cached'] = True
+            results.append(data)
+        return results
+    
+    async def _post_search_batch(self, queries: List[str], rerank: bool, endpoint: str) -> List[Dict]:
+        """Send a batch search request to the server."""
+        url = f"{self.base_url}{endpoint}/batch"
+        payload = {"queries": queries, "limit": 10, "rerank": rerank}
         
-        # Test without reranking
-        result_no_rerank = self.run_query(query, rerank=False)
-        time.sleep(0.5)  # Brief pause between requests
+        with timed() as timing:
+            response = await self.client.post(url, json=payload)
+        elapsed = timing.elapsed_ms
+        self.request_latency_ms.append(elapsed)
         
-        # Test with reranking
-        result_with_rerank = self.run_query(query, rerank=True)
+        if response.status_code == 200:
+            responses = _loads(response.content)["responses"]
+            for data in responses:
+                data['elapsed_ms'] = elapsed
+            return responses
+        else:
+            return [{"error": f"HTTP {response.status_code}", "elapsed_ms": elapsed} for _ in queries]
+    
+    async def test_single_query(self, query_data: TestQuery, index: int = None) -> Dict[str, Any]:
+        """
+        Test a single query with and without reranking.
+        
+        The result is stored as row `index` of self.results (the next free row
+        if None).
+        """
+        if index is None:
+            index = self.results.capacity
+            self.results.reserve(index + 1)
+        result = await self.run_query(query_data.query, endpoint=COMPARE_RERANK_ENDPOINT)
+        return self._record_comparison(index, query_data, result)
+    
+    async def test_query_batch(self, batch: List[TestQuery], indices: List[int]) -> List[Dict[str, Any]]:
+        """
+        Test several queries with and without reranking in one request.
+        
+        The results are stored as rows `indices` of self.results.
+        """
+        results = await self.run_queries_batch(
+            [query_data.query for query_data in batch], endpoint=COMPARE_RERANK_ENDPOINT
+        )
+        return [
+            self._record_comparison(index, query_data, result)
+            for index, query_data, result in zip(indices, batch, results)
+        ]
+    
+    def _record_comparison(self, index: int, query_data: TestQuery, result: Dict) -> Dict[str, Any]:
+        """
+        Build and store the comparison for a query from its compare_rerank response.
+        
+        The server retrieves once and ranks the candidates both ways. The
+        latencies are the query's own server-side timings: embedding plus
+        retrieval without reranking, and the rerank time on top of that. The
+        request time (shared by a whole batch) is kept as request_ms.
+        """
+        retrieval_ms = result.get("embed_ms", 0.0) + result.get("retrieval_ms", 0.0)
+        top_no_rerank = result.get("top_filename")
+        top_with_rerank = result.get("top_filename_rerank")
         
         # Compare results
         comparison = {
-            "query": query,
-            "category": query_data.get("category"),
-            "expected_doc": query_data.get("expected_doc"),
-            "expected_answer": query_data.get("expected_answer"),
+            "query": query_data.query,
+            "category": query_data.category,
+            "expected_doc": query_data.expected_doc,
+            "expected_answer": query_data.expected_answer,
+            "request_ms": result["elapsed_ms"],
             "without_rerank": {
-                "mode": result_no_rerank.get("mode"),
-                "elapsed_ms": result_no_rerank.get("elapsed_ms"),
-                "num_results": len(result_no_rerank.get("results", [])),
-                "top_result": result_no_rerank.get("results", [{}])[0] if result_no_rerank.get("results") else None
+                "elapsed_ms": retrieval_ms,
+                "num_results": result.get("num_results", 0),
+                "top_result": {"filename": top_no_rerank} if top_no_rerank else None
             },
             "with_rerank": {
-                "mode": result_with_rerank.get("mode"),
-                "elapsed_ms": result_with_rerank.get("elapsed_ms"),
-                "num_results": len(result_with_rerank.get("results", [])),
-                "top_result": result_with_rerank.get("results", [{}])[0] if result_with_rerank.get("results") else None
+                "elapsed_ms": retrieval_ms + result.get("rerank_ms", 0.0),
+                "num_results": result.get("num_results_rerank", 0),
+                "top_result": {"filename": top_with_rerank} if top_with_rerank else None
             }
         }
+        if "error" in result:
+            comparison["error"] = result["error"]
         
         # Check if reranking changed order
-        if (comparison["without_rerank"]["top_result"] and 
-            comparison["with_rerank"]["top_result"]):
-            
-            top_no_rerank = comparison["without_rerank"]["top_result"].get("filename")
-            top_with_rerank = comparison["with_rerank"]["top_result"].get("filename")
-            comparison["order_changed"] = (top_no_rerank != top_with_rerank)
+        if top_no_rerank and top_with_rerank:
+            comparison["order_changed"] = result["order_changed"]
             
             # Check rerank score impact
-            if "rerank_score" in comparison["with_rerank"]["top_result"]:
-                comparison["rerank_score"] = comparison["with_rerank"]["top_result"]["rerank_score"]
-                comparison["original_score"] = comparison["with_rerank"]["top_result"].get("original_score")
+            if result.get("rerank_score") is not None:
+                comparison["rerank_score"] = result["rerank_score"]
+                comparison["original_score"] = result.get("original_score")
         
-        self.results.append(comparison)
-        
-        # Print summary
-        print(f"  Without reranking: {comparison['without_rerank']['mode']} - {comparison['without_rerank']['elapsed_ms']:.1f}ms")
-        print(f"  With reranking:    {comparison['with_rerank']['mode']} - {comparison['with_rerank']['elapsed_ms']:.1f}ms")
-        if comparison.get("order_changed"):
-            print(f"  📊 Reranking changed top result!")
+        self.results.record(index, comparison)
         
         return comparison
     
-    def run_all_tests(self, queries_file: str = "./test_queries.json"):
-        """Run all test queries."""
+    async def run_all_tests(self, queries_file: str = "./test_queries.json", full: bool = False):
+        """
+        Run all test queries.
+        
+        Unless `full` is set, each category is first sampled with up to
+        CONVERGENCE_SAMPLES queries; the rest of a category is only run if the
+        sampled reranking verdict (top result changed or not) isn't consistent.
+        """
         try:
-            with open(queries_file, 'r') as f:
-                test_data = json.load(f)
+            test_data = _loads(Path(queries_file).read_bytes())
+            queries = _TEST_QUERIES.validate_python(test_data.get("test_queries", []))
         except FileNotFoundError:
             print(f"❌ Test queries file not found: {queries_file}")
             return
+        except ValidationError as e:
+            print(f"❌ Invalid test queries in {queries_file}:\n{e}")
+            return
         
-        queries = test_data.get("test_queries", [])
         print(f"\n🧪 Running {len(queries)} test queries...")
+        self.results = QueryResults(len(queries))
+        self.skipped = {}
+        self.request_latency_ms = []
+        self._done = 0
         
-        for i, query_data in enumerate(queries, 1):
-            print(f"\n[{i}/{len(queries)}]")
-            self.test_single_query(query_data)
-            time.sleep(0.5)  # Brief pause between tests
+        limits = httpx.Limits(max_keepalive_connections=16)
+        try:
+            client = httpx.AsyncClient(http2=True, limits=limits, timeout=60)
+        except ImportError:
+            # h2 package not installed
+            client = httpx.AsyncClient(limits=limits, timeout=60)
+        
+        # Detailed results are appended one JSON line per query as they
+        # complete, so an interrupted run keeps everything finished so far
+        results_file = f"rag_test_results_{self.run_timestamp}.jsonl"
+        async with client:
+            self.client = client
+            with open(results_file, 'ab') as log:
+                if full:
+                    await self._run_queries(queries, list(range(len(queries))), log)
+                else:
+                    by_category = defaultdict(list)
+                    for i, query_data in enumerate(queries):
+                        by_category[query_data.category or "unknown"].append(i)
+                    
+                    sampled = [i for indices in by_category.values() for i in indices[:CONVERGENCE_SAMPLES]]
+                    await self._run_queries(queries, sampled, log)
+                    
+                    remaining = []
+                    for cat, indices in by_category.items():
+                        rest = indices[CONVERGENCE_SAMPLES:]
+                        if rest and self._category_converged(indices[:CONVERGENCE_SAMPLES]):
+                            self.skipped[cat] = len(rest)
+                        else:
+                            remaining.extend(rest)
+                    
+                    for cat, count in sorted(self.skipped.items()):
+                        print(f"\n⏭️  {cat}: verdict converged, assuming it for {count} remaining queries")
+                    await self._run_queries(queries, sorted(remaining), log)
+        self.client = None
+        print(f"\n💾 Detailed results saved to: {results_file}")
         
         # Generate report
         self.generate_report()
     
+    async def _run_queries(self, queries: List[TestQuery], indices: List[int], log):
+        """Run the queries at `indices` in concurrent batches, reporting and logging each result."""
+        sys.stdout.flush()
+        semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        
+        async def run_batch(batch_indices: List[int]):
+            batch = [queries[i] for i in batch_indices]
+            async with semaphore:
+                try:
+                    return batch, await self.test_query_batch(batch, batch_indices)
+                except Exception as e:
+                    return batch, e
+        
+        # Dispatch every batch up front so the server sees them together;
+        # report each one as it completes
+        tasks = [
+            asyncio.ensure_future(run_batch(indices[start:start + QUERY_BATCH_SIZE]))
+            for start in range(0, len(indices), QUERY_BATCH_SIZE)
+        ]
+        for task in asyncio.as_completed(tasks):
+            batch, results = await task
+            for j, query_data in enumerate(batch):
+                self._done += 1
+                event = {"event": "query", "n": self._done, "total": len(queries), "query": query_data.query}
+                if isinstance(results, Exception):
+                    event["error"] = str(results)
+                else:
+                    comparison = results[j]
+                    if "error" in comparison:
+                        event["error"] = comparison["error"]
+                    else:
+                        event["no_rerank_ms"] = round(comparison["without_rerank"]["elapsed_ms"], 1)
+                        event["rerank_ms"] = round(comparison["with_rerank"]["elapsed_ms"], 1)
+                        event["order_changed"] = bool(comparison.get("order_changed"))
+                    log.write(_dumps(comparison) + b"\n")
+                self.progress.emit(event)
+            log.flush()
+        self.progress.flush()
+    
+    def _category_converged(self, indices: List[int]) -> bool:
+        """
+        Whether enough sampled queries agree on whether reranking changes the top result.
+        
+        Failed queries don't count as samples, so a failing server never makes
+        a category look converged.
+        """
+        rows = [i for i in indices if self.results.filled[i] and not self.results.error[i]]
+        if len(rows) < CONVERGENCE_SAMPLES:
+            return False
+        changed_ratio = self.results.order_changed[rows].mean()
+        return abs(changed_ratio - 0.5) > CONVERGENCE_MARGIN
+    
     def generate_report(self):
         """Generate a test report."""
         if not self.results:
@@ -149,68 +642,150 @@ class RAGTester:
         print("📊 RAG VALIDATION REPORT")
         print("="*80)
         
-        # Summary statistics
-        total = len(self.results)
-        order_changed = sum(1 for r in self.results if r.get("order_changed"))
+        # Summary statistics over the successful rows
+        results = self.results
+        rows = np.flatnonzero(results.filled & ~results.error)
+        failed = int((results.filled & results.error).sum())
+        total = len(rows)
+        if not total:
+            print(f"\n❌ All {failed} test queries failed")
+            return
+        latency_no_rerank = results.elapsed_no_rerank[rows]
+        latency_with_rerank = results.elapsed_with_rerank[rows]
+        reordered = results.order_changed[rows]
         
-        avg_latency_no_rerank = sum(r["without_rerank"]["elapsed_ms"] for r in self.results) / total
-        avg_latency_with_rerank = sum(r["with_rerank"]["elapsed_ms"] for r in self.results) / total
-        rerank_overhead = avg_latency_with_rerank - avg_latency_no_rerank
+        order_changed = int(reordered.sum())
+        avg_latency_no_rerank = float(latency_no_rerank.mean())
+        avg_latency_with_rerank = float(latency_with_rerank.mean())
+        rerank_overhead = float((latency_with_rerank - latency_no_rerank).mean())
+        avg_upload_latency = float(np.mean(self.upload_latency_ms)) if self.upload_latency_ms else None
+        avg_request_latency = float(np.mean(self.request_latency_ms)) if self.request_latency_ms else None
         
-        print(f"\nTotal Queries: {total}")
+        print(f"\nTotal Queries: {total + failed}")
+        if failed:
+            print(f"Failed (excluded from statistics): {failed}")
+        if self.skipped:
+            print(f"Skipped (category verdict converged): {sum(self.skipped.values())}")
         print(f"Results Reordered by Reranking: {order_changed} ({order_changed/total*100:.1f}%)")
-        print(f"\nAverage Latency:")
+        print(f"\nAverage Latency per Query (server-side):")
         print(f"  Without Reranking: {avg_latency_no_rerank:.1f}ms")
         print(f"  With Reranking:    {avg_latency_with_rerank:.1f}ms")
         print(f"  Reranking Overhead: {rerank_overhead:.1f}ms")
+        if self.request_latency_ms or self.upload_latency_ms:
+            print(f"\nAverage Latency per Request:")
+        if self.request_latency_ms:
+            print(
+                f"  Search ({len(self.request_latency_ms)} requests, up to "
+                f"{QUERY_BATCH_SIZE} queries each): {avg_request_latency:.1f}ms"
+            )
+        if self.upload_latency_ms:
+            print(f"  Upload ({len(self.upload_latency_ms)} requests): {avg_upload_latency:.1f}ms")
         
         # Category breakdown
         print(f"\nResults by Category:")
-        categories = {}
-        for result in self.results:
-            cat = result.get("category", "unknown")
-            if cat not in categories:
-                categories[cat] = {"total": 0, "reordered": 0}
-            categories[cat]["total"] += 1
-            if result.get("order_changed"):
-                categories[cat]["reordered"] += 1
-        
-        for cat, stats in sorted(categories.items()):
-            reorder_pct = stats["reordered"] / stats["total"] * 100 if stats["total"] > 0 else 0
-            print(f"  {cat}: {stats['reordered']}/{stats['total']} reordered ({reorder_pct:.0f}%)")
-        
-        # Top reranking impacts
-        rerank_impacts = [r for r in self.results if r.get("rerank_score") and r.get("original_score")]
-        if rerank_impacts:
-            rerank_impacts.sort(key=lambda x: abs(x["rerank_score"] - x["original_score"]), reverse=True)
+        categories, category_idx = np.unique(
+            np.array([results.category[i] for i in rows], dtype=str), return_inverse=True
+        )
+        category_totals = np.bincount(category_idx, minlength=len(categories))
+        category_reordered = np.bincount(category_idx, weights=reordered, minlength=len(categories))
+        for cat, cat_total, cat_reordered in zip(categories, category_totals, category_reordered.astype(int)):
+            reorder_pct = cat_reordered / cat_total * 100 if cat_total > 0 else 0
+            print(f"  {cat}: {cat_reordered}/{cat_total} reordered ({reorder_pct:.0f}%)")
+        
+        # Top reranking impacts (rows with both scores set and non-zero)
+        deltas = results.rerank_score[rows] - results.original_score[rows]
+        scored = np.flatnonzero(
+            ~np.isnan(deltas) & (results.rerank_score[rows] != 0) & (results.original_score[rows] != 0)
+        )
+        if len(scored):
+            # Largest |delta| first; the stable sort keeps query order on ties
+            top = scored[np.argsort(-np.abs(deltas[scored]), kind="stable")[:5]]
             print(f"\nTop 5 Reranking Impacts:")
-            for i, r in enumerate(rerank_impacts[:5], 1):
-                delta = r["rerank_score"] - r["original_score"]
-                print(f"  {i}. {r['query'][:60]}...")
-                print(f"     Score change: {r['original_score']:.3f} → {r['rerank_score']:.3f} (Δ{delta:+.3f})")
-        
-        # Save detailed results
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = f"rag_test_results_{timestamp}.json"
+            for i, k in enumerate(top, 1):
+                row = rows[k]
+                print(f"  {i}. {results.query[row][:60]}...")
+                print(f"     Score change: {results.original_score[row]:.3f} → {results.rerank_score[row]:.3f} (Δ{deltas[k]:+.3f})")
+        
+        # Save summary (detailed results are in the run's JSONL file)
+        output_file = f"rag_test_results_{self.run_timestamp}_summary.json"
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump({
-                "timestamp": timestamp,
+                "timestamp": self.run_timestamp,
                 "summary": {
-                    "total_queries": total,
+                    "total_queries": total + failed,
+                    "failed_queries": failed,
                     "reordered_count": order_changed,
                     "avg_latency_no_rerank_ms": avg_latency_no_rerank,
                     "avg_latency_with_rerank_ms": avg_latency_with_rerank,
-                    "rerank_overhead_ms": rerank_overhead
+                    "rerank_overhead_ms": rerank_overhead,
+                    "avg_request_latency_ms": avg_request_latency,
+                    "avg_upload_latency_ms": avg_upload_latency,
+                    "skipped_converged": self.skipped,
                 },
-                "detailed_results": self.results
             }, f, indent=2, ensure_ascii=False)
         
-        print(f"\n💾 Detailed results saved to: {output_file}")
+        print(f"\n💾 Summary saved to: {output_file}")
         print("="*80)
 
 
+def _normalize_query(query: str) -> str:
+    """Collapse whitespace so trivially different spellings share a cache entry."""
+    return " ".join(query.split())
+
+
+# Cached listings by directory: (directory mtime, listed at, listing)
+_pdf_listings: Dict[str, Tuple[int, float, Tuple[Tuple[str, str, int], ...]]] = {}
+
+
+def _list_pdfs(pdf_dir: str) -> Tuple[Tuple[str, str, int], ...]:
+    """
+    List the PDFs in a directory as (name, path, size) tuples.
+    
+    A listing is reused for PDF_LISTING_TTL seconds as long as the directory's
+    mtime is unchanged (no PDF added, removed or renamed), so repeated uploads
+    cost one stat instead of a glob plus a stat per file. The sizes only bound
+    the upload batches, so a PDF rewritten in place within the TTL is harmless.
+    """
+    mtime = Path(pdf_dir).stat().st_mtime_ns
+    now = time.monotonic()
+    cached = _pdf_listings.get(pdf_dir)
+    if cached and cached[0] == mtime and now - cached[1] < PDF_LISTING_TTL:
+        return cached[2]
+    
+    listing = tuple(
+        (pdf_file.name, str(pdf_file), pdf_file.stat().st_size)
+        for pdf_file in sorted(Path(pdf_dir).glob("*.pdf"))
+    )
+    _pdf_listings[pdf_dir] = (mtime, now, listing)
+    return listing
+
+
+def _batch_by_size(pdfs: Tuple[Tuple[str, str, int], ...]) -> List[List[Tuple[str, str, int]]]:
+    """Group files into upload batches bounded by file count and total size."""
+    batches = []
+    batch, batch_bytes = [], 0
+    for pdf_file in pdfs:
+        size = pdf_file[2]
+        if batch and (len(batch) >= BULK_UPLOAD_MAX_FILES or batch_bytes + size > BULK_UPLOAD_MAX_BYTES):
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append(pdf_file)
+        batch_bytes += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
 def main():
     """Main test execution."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="run every query, even in categories whose reranking verdict has converged",
+    )
+    args = parser.parse_args()
+    
     print("🚀 RAG Validation Suite")
     print("="*80)
     
@@ -225,7 +800,7 @@ def main():
     print(f"\n✓ Successfully uploaded {len(uploaded)} test documents")
     
     # Step 2: Run validation tests
-    tester.run_all_tests()
+    asyncio.run(tester.run_all_tests(full=args.full))
     
     print("\n✅ Validation complete!")
 